@@ -0,0 +1,130 @@
+"""
+Startup benchmark for the keyword libraries.
+
+Every sample runs in a fresh interpreter, since imports are only paid once per
+process and SLIs launch one process per run. Three kinds of targets are timed:
+
+    import:<module>         plain `import <module>`
+    library:<name>          Robot library load (module import + keyword discovery),
+                            with Robot itself already imported as in a real run
+    suite:<robot file>      all libraries from the suite's Settings section
+
+Results use the same format as bench_keywords.py, so `--compare` works the same:
+
+    python benchmarks/bench_import.py --output import_baseline.json
+    python benchmarks/bench_import.py --compare import_baseline.json
+"""
+
+import argparse, json, os, re, statistics, subprocess, sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+LIBRARIES = os.path.join(ROOT, "libraries")
+sys.path.insert(0, HERE)
+
+from bench_keywords import _percentile, _print_row, compare  # noqa: E402
+
+TARGETS = (
+    "import:RW.Systest",
+    "import:RW._codec",
+    "import:RW.Workspace",
+    "library:RW.Systest",
+    "library:RW.Workspace",
+    "suite:codebundles/e2e-runsession-systest/sli.robot",
+    "suite:codebundles/e2e-runsession-systest/runbook.robot",
+    "suite:codebundles/runsession-load-test/runbook.robot",
+)
+
+# Runs in the child interpreter; prints {"seconds": ..., "peak": ...}.
+_CHILD = r"""
+import importlib, json, sys, time, tracemalloc
+kind, value, memory = sys.argv[1], sys.argv[2], sys.argv[3] == "1"
+if kind in ("library", "suite"):
+    from robot.running.testlibraries import TestLibrary
+    names = json.loads(value) if kind == "suite" else [value]
+if memory:
+    tracemalloc.start()
+started = time.perf_counter()
+if kind == "import":
+    importlib.import_module(value)
+else:
+    for name in names:
+        TestLibrary.from_name(name)
+seconds = time.perf_counter() - started
+peak = tracemalloc.get_traced_memory()[1] if memory else 0
+print(json.dumps({"seconds": seconds, "peak": peak}))
+"""
+
+
+def suite_libraries(path: str) -> list:
+    """Library names from the *** Settings *** section of a robot file."""
+    with open(os.path.join(ROOT, path), encoding="utf-8") as f:
+        return re.findall(r"^Library\s{2,}(\S+)", f.read(), flags=re.MULTILINE)
+
+
+def sample(target: str, memory: bool = False) -> dict:
+    kind, value = target.split(":", 1)
+    if kind == "suite":
+        value = json.dumps(suite_libraries(value))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [LIBRARIES, os.getenv("PYTHONPATH")])))
+    proc = subprocess.run(
+        [sys.executable, "-c", _CHILD, kind, value, "1" if memory else "0"],
+        env=env, capture_output=True, text=True, cwd=ROOT,
+    )
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def measure(target: str, repeat: int) -> dict:
+    durations = [sample(target)["seconds"] for _ in range(repeat)]
+    peak = sample(target, memory=True)["peak"]
+    mean = statistics.fmean(durations)
+    return {
+        "items": 1,
+        "repeat": repeat,
+        "mean": round(mean, 6),
+        "p50": round(_percentile(durations, 0.5), 6),
+        "p95": round(_percentile(durations, 0.95), 6),
+        "throughput": round(1 / mean, 1) if mean else None,
+        "peakKiB": round(peak / 1024, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--targets", help="comma separated targets (default: all)")
+    parser.add_argument("--repeat", type=int, default=7, help="fresh interpreters per target")
+    parser.add_argument("--output", default="bench_import_results.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="baseline results to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    targets = args.targets.split(",") if args.targets else TARGETS
+    results = {}
+    for target in targets:
+        try:
+            results[target] = measure(target, args.repeat)
+        except Exception as e:  # e.g. a library that isn't installed here
+            results[target] = {"error": f"{type(e).__name__}: {e}"}
+        _print_row(target, results[target])
+
+    current = {"meta": {"python": sys.version.split()[0], "repeat": args.repeat}, "results": results}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(current, json.load(f), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"No regressions against {args.compare} (tolerance {args.tolerance:.0%}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
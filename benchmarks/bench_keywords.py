@@ -0,0 +1,451 @@
+"""
+Offline benchmarks for the RW.Systest and RW.Workspace keywords.
+
+Each keyword is run against the fake PAPI server (see fake_papi.py) at several
+scales. For every keyword and scale the harness records latency (mean, p50,
+p95), throughput (items per second, where an item is an SLX, runRequest or
+task depending on the keyword) and peak traced memory, and writes them to a
+JSON file. Passing `--compare` checks the run against an earlier baseline and
+exits non-zero if anything regressed beyond the tolerance.
+
+    python benchmarks/bench_keywords.py --output baseline.json
+    python benchmarks/bench_keywords.py --compare baseline.json
+    python benchmarks/bench_keywords.py --profile full --cases slxs,runsession
+
+The server runs in a separate process so its allocations and CPU time are not
+counted against the keywords.
+"""
+
+import argparse, contextlib, json, multiprocessing, os, platform as py_platform, statistics, sys
+import tempfile, time, tracemalloc
+from datetime import datetime, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "libraries"))
+sys.path.insert(0, HERE)
+
+from fake_papi import FakePapi, FakePapiConfig, make_runsession, make_slx, slx_short_name  # noqa: E402
+
+PROFILES = {
+    "quick": {"slx": (100, 1000), "rr": (10, 100)},
+    "default": {"slx": (100, 1000, 10000), "rr": (10, 100, 1000)},
+    "full": {"slx": (100, 1000, 10000, 100000), "rr": (10, 100, 1000, 10000)},
+}
+# Scales at or above this many items are run at most twice; a full 100k
+# listing takes long enough that more repeats add little.
+LARGE_SCALE = 10000
+SCOPE_TAGS = [{"name": "systest", "value": "scope"}]
+BENCH_TOKEN = "bench-token"
+
+# RW.platform reads the mode when it is first imported; dev mode takes the
+# access token from the environment instead of the secrets provider.
+os.environ.update({"RW_MODE": "dev", "RW_ACCESS_TOKEN": BENCH_TOKEN, "RW_USER_TOKEN": BENCH_TOKEN})
+
+
+# -- fake server process ------------------------------------------------------
+
+def _serve(config, port_queue):
+    papi = FakePapi(config)
+    papi.start()
+    port_queue.put(papi.url)
+    while True:
+        time.sleep(3600)
+
+
+def start_server(config: FakePapiConfig):
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(config, queue), daemon=True)
+    process.start()
+    return process, queue.get(timeout=30)
+
+
+# -- benchmark cases ------------------------------------------------------------
+#
+# A case is `setup(ctx, scale) -> (callable, items)`; only the callable is
+# measured. `ctx` carries the server URL, token and a scratch directory.
+
+CASES = []
+
+
+def case(name: str, dimension: str = None):
+    """Register a benchmark; `dimension` is "slx", "rr" or None (single run)."""
+    def decorator(setup):
+        CASES.append((name, dimension, setup))
+        return setup
+    return decorator
+
+
+class Context:
+    def __init__(self, url: str, workdir: str, page_size: int):
+        from RW import platform
+        self.url = url
+        self.workdir = workdir
+        self.page_size = page_size
+        self.token = platform.Secret("RW_API_TOKEN", BENCH_TOKEN)
+        # RW.Workspace keywords read these platform variables.
+        os.environ.update({
+            "RW_WORKSPACE_API_URL": f"{url}/workspaces",
+            "RW_SYSTEST_STATE_DIR": os.path.join(workdir, "state"),
+        })
+
+    def workspace(self, slxs: int) -> str:
+        return f"bench-{slxs}"
+
+    def set_runsession(self, workspace: str, runsession_id: int, runrequest_id: int = 0):
+        os.environ.update({
+            "RW_WORKSPACE": workspace,
+            "RW_SESSION_ID": str(runsession_id),
+            "RW_RUNREQUEST_ID": str(runrequest_id),
+        })
+
+    def create_runsession(self, workspace: str, run_requests: int, settle: bool = True) -> int:
+        """Create a RunSession on the fake server and, if `settle`, poll until fully grown."""
+        import requests
+        body = {"runRequests": [{"slxName": f"{workspace}--{slx_short_name(n)}"} for n in range(run_requests)]}
+        url = f"{self.url}/workspaces/{workspace}/runsessions"
+        runsession_id = requests.post(url, json=body).json()["id"]
+        while settle and len(requests.get(f"{url}/{runsession_id}").json()["runRequests"]) < run_requests:
+            pass
+        return runsession_id
+
+
+def _runsession_json(run_requests: int) -> str:
+    return json.dumps(make_runsession("bench", 1, run_requests))
+
+
+@case("Systest.get_workspace_slxs", "slx")
+def _(ctx, n):
+    from RW.Systest import systest
+    ws = ctx.workspace(n)
+    return lambda: systest.get_workspace_slxs(ctx.url, ctx.token, ws), n
+
+
+@case("Systest.get_workspace_slx_records", "slx")
+def _(ctx, n):
+    from RW.Systest import inventory
+    ws = ctx.workspace(n)
+    return lambda: inventory.get_workspace_slx_records(ctx.url, ctx.token, ws, include_groups=True), n
+
+
+@case("Systest.get_slxs_with_tag", "slx")
+def _(ctx, n):
+    from RW.Systest import systest
+    ws = ctx.workspace(n)
+    return lambda: systest.get_slxs_with_tag(SCOPE_TAGS, ctx.url, ctx.token, ws), n
+
+
+@case("Systest.get_slxs_with_tags_from_dict", "slx")
+def _(ctx, n):
+    from RW.Systest import systest
+    data = json.dumps({"results": [make_slx("bench", i) for i in range(n)]})
+    return lambda: systest.get_slxs_with_tags_from_dict(SCOPE_TAGS, data), n
+
+
+@case("Systest.sweep_workspace_slx_inventory", "slx")
+def _(ctx, n):
+    from RW.Systest import inventory
+    workspaces = [f"sweep-{w}-{n // 4}" for w in range(4)]
+    artifact = os.path.join(ctx.workdir, "sweep.jsonl")
+    return lambda: inventory.sweep_workspace_slx_inventory(
+        workspaces, ctx.url, ctx.token, artifact_filename=artifact
+    ), n
+
+
+@case("Systest.sync_workspace_slx_inventory", "slx")
+def _(ctx, n):
+    from RW.Systest import inventory
+    ws = ctx.workspace(n)
+    # Measure the steady state: the first sync writes the snapshot.
+    inventory.sync_workspace_slx_inventory(ctx.url, ctx.token, ws)
+    return lambda: inventory.sync_workspace_slx_inventory(ctx.url, ctx.token, ws), n
+
+
+@case("Systest.get_slx_names_with_tags", "slx")
+def _(ctx, n):
+    from RW.Systest import inventory
+    ws = ctx.workspace(n)
+    inventory.sync_workspace_slx_inventory(ctx.url, ctx.token, ws)
+    return lambda: inventory.get_slx_names_with_tags(ws, SCOPE_TAGS), n
+
+
+@case("Systest.get_workspace_config", "slx")
+def _(ctx, n):
+    from RW.Systest import systest
+    ws = ctx.workspace(n)
+    return lambda: systest.get_workspace_config(ctx.url, ctx.token, ws), n
+
+
+@case("Systest.get_nearby_slxs", "slx")
+def _(ctx, n):
+    from RW.Systest import systest
+    config = FakePapi(FakePapiConfig())._workspace_yaml(ctx.workspace(n))
+    last = slx_short_name(n - 1)
+    return lambda: systest.get_nearby_slxs(config, last), n
+
+
+@case("Systest.get_workspace_index_status")
+def _(ctx, n):
+    from RW.Systest import systest
+    return lambda: systest.get_workspace_index_status(ctx.url, ctx.token, ctx.workspace(100)), 1
+
+
+@case("Systest.perform_task_search")
+def _(ctx, n):
+    from RW.Systest import systest
+    ws = ctx.workspace(100)
+    return lambda: systest.perform_task_search(ctx.url, ctx.token, ws, query="Cart service is down"), 1
+
+
+@case("Systest.create_runsession_from_task_search", "rr")
+def _(ctx, n):
+    from RW.Systest import systest
+    search = {"tasks": [
+        {"score": 0.9, "workspaceTask": {"slxShortName": slx_short_name(i), "resolvedTitle": f"Task {i}"}}
+        for i in range(n)
+    ]}
+    ws = ctx.workspace(100)
+    return lambda: systest.create_runsession_from_task_search(
+        search, ctx.token, ctx.url, ws, query="Cart service is down"
+    ), n
+
+
+@case("Systest.wait_for_runsession_tasks_to_complete", "rr")
+def _(ctx, n):
+    from RW.Systest import systest
+    ws = ctx.workspace(100)
+
+    def run():
+        # Each measured call waits for a fresh RunSession to grow to n runRequests.
+        runsession_id = ctx.create_runsession(ws, n, settle=False)
+        return systest.wait_for_runsession_tasks_to_complete(ws, runsession_id, ctx.url, ctx.token, poll_interval=0)
+    return run, n
+
+
+def _pure_runsession_case(name, call):
+    @case(f"Systest.{name}", "rr")
+    def _(ctx, n):
+        from RW.Systest import systest
+        data = _runsession_json(n)
+        return lambda: call(systest, data), n
+
+
+_pure_runsession_case("get_visited_slx_and_tasks_from_runsession",
+                      lambda m, data: m.get_visited_slx_and_tasks_from_runsession(json.loads(data)))
+_pure_runsession_case("get_runsession_source", lambda m, data: m.get_runsession_source(json.loads(data)))
+_pure_runsession_case("count_open_issues", lambda m, data: m.count_open_issues(data))
+_pure_runsession_case("get_open_issues", lambda m, data: m.get_open_issues(data))
+_pure_runsession_case("generate_open_issue_markdown_table",
+                      lambda m, data: m.generate_open_issue_markdown_table(m.get_open_issues(data)))
+_pure_runsession_case("summarize_runsession_users", lambda m, data: m.summarize_runsession_users(data))
+_pure_runsession_case("extract_issue_keywords", lambda m, data: m.extract_issue_keywords(data))
+_pure_runsession_case("get_most_referenced_resource", lambda m, data: m.get_most_referenced_resource(data))
+
+
+@case("Systest.get_runsession_resource_trends")
+def _(ctx, n):
+    from RW.Systest import analytics
+    ws = ctx.workspace(100)
+    # Reads the fake server's whole RunSession history.
+    return lambda: analytics.get_runsession_resource_trends(ctx.url, ctx.token, ws), FakePapiConfig().runsession_history
+
+
+@case("Systest.format_systest_timings")
+def _(ctx, n):
+    from RW.Systest import instrumentation
+    return lambda: instrumentation.format_systest_timings(), 1
+
+
+@case("Workspace.get_slxs_with_tag", "slx")
+def _(ctx, n):
+    from RW.Workspace import workspace_utils
+    ctx.set_runsession(ctx.workspace(n), 0)
+    # This keyword only reads the first page of the listing.
+    return lambda: workspace_utils.get_slxs_with_tag(SCOPE_TAGS), min(n, ctx.page_size)
+
+
+@case("Workspace.run_tasks_for_slx")
+def _(ctx, n):
+    from RW.Workspace import workspace_utils
+    ws = ctx.workspace(100)
+    ctx.set_runsession(ws, ctx.create_runsession(ws, 1))
+    return lambda: workspace_utils.run_tasks_for_slx(slx_short_name(0)), 1
+
+
+@case("Workspace.import_runsession_details", "rr")
+def _(ctx, n):
+    from RW.Workspace import workspace_utils
+    ws = ctx.workspace(100)
+    runsession_id = ctx.create_runsession(ws, n)
+    ctx.set_runsession(ws, runsession_id)
+    return lambda: workspace_utils.import_runsession_details(runsession_id), n
+
+
+@case("Workspace.import_memo_variable", "rr")
+def _(ctx, n):
+    from RW.Workspace import workspace_utils
+    ws = ctx.workspace(100)
+    runsession_id = ctx.create_runsession(ws, n)
+    # The memo of the last runRequest is the worst case for the lookup.
+    ctx.set_runsession(ws, runsession_id, runsession_id * 100000 + n - 1)
+    return lambda: workspace_utils.import_memo_variable("bench"), n
+
+
+@case("Workspace.import_related_runsession_details", "rr")
+def _(ctx, n):
+    from RW.Workspace import workspace_utils
+    ws = ctx.workspace(100)
+    runsession_id = ctx.create_runsession(ws, n)
+    ctx.set_runsession(ws, runsession_id)
+    record = json.dumps({"notes": json.dumps({"runsessionId": runsession_id})})
+    return lambda: workspace_utils.import_related_runsession_details(record), n
+
+
+# -- measurement ------------------------------------------------------------------
+
+def _percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(func, items: int, repeat: int, warmup: int = 1) -> dict:
+    # Several keywords print their results; keep the benchmark output readable.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        return _measure(func, items, repeat, warmup)
+
+
+def _measure(func, items: int, repeat: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        func()
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+
+    # Memory is measured on a separate call so tracing doesn't skew the timings.
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    mean = statistics.fmean(durations)
+    return {
+        "items": items,
+        "repeat": repeat,
+        "mean": round(mean, 6),
+        "p50": round(_percentile(durations, 0.5), 6),
+        "p95": round(_percentile(durations, 0.95), 6),
+        "throughput": round(items / mean, 1) if mean else None,
+        "peakKiB": round(peak / 1024, 1),
+    }
+
+
+def run(args) -> dict:
+    from RW import _codec
+
+    config = FakePapiConfig(
+        page_size=args.page_size, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, growth=max(1, max(PROFILES[args.profile]["rr"]) // 4),
+    )
+    process, url = start_server(config)
+    selected = [c.strip() for c in args.cases.split(",")] if args.cases else None
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            ctx = Context(url, workdir, args.page_size)
+            for name, dimension, setup in CASES:
+                if selected and not any(s.lower() in name.lower() for s in selected):
+                    continue
+                scales = PROFILES[args.profile][dimension] if dimension else (1,)
+                for scale in scales:
+                    key = f"{name}[{dimension}={scale}]" if dimension else name
+                    func, items = setup(ctx, scale)
+                    repeat = min(args.repeat, 2) if items >= LARGE_SCALE else args.repeat
+                    try:
+                        results[key] = measure(func, items, repeat)
+                    except Exception as e:  # record the failure, keep benchmarking
+                        results[key] = {"error": f"{type(e).__name__}: {e}"}
+                    _print_row(key, results[key])
+    finally:
+        process.terminate()
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": py_platform.platform(),
+            "jsonCodec": _codec.codec_name(),
+            "profile": args.profile,
+            "latency": args.latency,
+            "pageSize": args.page_size,
+        },
+        "results": results,
+    }
+
+
+def _print_row(key: str, result: dict) -> None:
+    if "error" in result:
+        print(f"{key:<72} ERROR {result['error']}", flush=True)
+        return
+    print(
+        f"{key:<72}{result['p50'] * 1000:>10.2f} ms p50{result['p95'] * 1000:>10.2f} ms p95"
+        f"{result['throughput'] or 0:>14.1f} items/s{result['peakKiB']:>12.1f} KiB",
+        flush=True,
+    )
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """Return a description of every result that regressed beyond `tolerance`."""
+    regressions = []
+    for key, result in current["results"].items():
+        previous = baseline.get("results", {}).get(key)
+        if not previous or "error" in previous:
+            continue
+        if "error" in result:
+            regressions.append(f"{key}: now fails ({result['error']})")
+            continue
+        for metric in ("p50", "peakKiB"):
+            # Ignore tiny absolute values, which are mostly noise.
+            floor = 0.001 if metric == "p50" else 64
+            before, after = previous[metric], result[metric]
+            if after > max(before, floor) * (1 + tolerance):
+                regressions.append(f"{key}: {metric} {before} -> {after} (+{(after / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="default", help="scales to run")
+    parser.add_argument("--cases", help="comma separated substrings selecting benchmarks")
+    parser.add_argument("--repeat", type=int, default=5, help="timed calls per benchmark")
+    parser.add_argument("--latency", type=float, default=0.0, help="fake server latency per response, in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--output", default="bench_results.json", help="where to write the results")
+    parser.add_argument("--compare", metavar="BASELINE", help="baseline results to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown / growth")
+    args = parser.parse_args(argv)
+
+    current = run(args)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(current, json.load(f), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"No regressions against {args.compare} (tolerance {args.tolerance:.0%}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,420 @@
+"""
+Local stand-in for the RunWhen PAPI endpoints used by the RW.Systest and
+RW.Workspace keywords, for offline benchmarks and CI runs.
+
+Emulated endpoints (all under /api/v3/workspaces/<workspace>):
+    GET   slxs                          paginated (?page=, ?page_size=, ?modified_after=)
+    GET   slxs/<slx>                    single SLX document
+    GET   slxs/<slx>/runbook            runbook with codeBundle tasks
+    GET   branches/main/workspace.yaml  ?format=json, with slxGroups
+    GET   index-status
+    POST  task-search
+    GET   runsessions                   paginated list of recent RunSessions
+    POST  runsessions
+    GET   runsessions/<id>              runRequests grow on each poll until complete
+    PATCH runsessions/<id>              append runRequests / close (active=false)
+
+Workspaces are synthetic and generated on demand from their index, so even
+100k SLXs cost no server memory. A trailing number in the workspace name sets
+its size (e.g. `bench-10000` has 10,000 SLXs); otherwise --slxs applies.
+Every 50th SLX is tagged systest:scope and the next one systest:validate.
+
+Run standalone:
+    python benchmarks/fake_papi.py --port 8765 --slxs 1000 --latency 0.05
+and point the keywords (or PAPI_URL) at http://127.0.0.1:8765/api/v3.
+"""
+
+import argparse, hashlib, itertools, json, random, re, threading, time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+SEVERITIES = (4, 3, 3, 2, 4, 1, 3, 4)
+
+
+@dataclass
+class FakePapiConfig:
+    slx_count: int = 100              # SLXs per workspace, unless the name carries a size
+    page_size: int = 100              # default page size of the slxs listing
+    run_requests: int = 10            # runRequests a RunSession grows to
+    growth: int = 5                   # runRequests added per RunSession poll
+    issues_per_request: int = 2
+    tasks_per_slx: int = 3            # tasks returned per SLX by task-search
+    search_slxs: int = 20             # SLXs considered by an unscoped task-search
+    runsession_history: int = 50      # RunSessions returned by the runsessions listing
+    group_size: int = 10              # SLXs per slxGroup
+    latency: float = 0.0              # seconds added to every response
+    jitter: float = 0.0               # extra uniform random latency, in seconds
+    error_rate: float = 0.0           # fraction of requests answered with error_status
+    error_status: int = 503
+    seed: int = 7
+
+
+def _stable_fraction(*parts) -> float:
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") / 2**32
+
+
+def workspace_size(workspace: str, default: int) -> int:
+    match = re.search(r"-(\d+)$", workspace)
+    return int(match.group(1)) if match else default
+
+
+def slx_short_name(i: int) -> str:
+    return f"slx-{i:06d}"
+
+
+def make_slx(workspace: str, i: int) -> dict:
+    tags = [
+        {"name": "namespace", "value": f"ns-{i % 25}"},
+        {"name": "cluster", "value": f"cluster-{i % 3}"},
+    ]
+    if i % 50 == 0:
+        tags.append({"name": "systest", "value": "scope"})
+    elif i % 50 == 1:
+        tags.append({"name": "systest", "value": "validate"})
+    short_name = slx_short_name(i)
+    return {
+        "name": f"{workspace}--{short_name}",
+        "shortName": short_name,
+        "modified": EPOCH.isoformat(),
+        "spec": {
+            "alias": f"Synthetic SLX {i}",
+            "statement": "Synthetic resources should be healthy.",
+            "owners": ["bench@example.com"],
+            "tags": tags,
+            "configProvided": [{"name": "NAMESPACE", "value": f"ns-{i % 25}"}],
+        },
+        "status": {"codeBundle": {"repoUrl": "https://example.com/codecollection.git", "pathToRobot": "runbook.robot"}},
+    }
+
+
+def make_tasks(slx: str) -> list:
+    return [f"Check `{slx}` resource health {n}" for n in range(3)]
+
+
+def make_run_request(workspace: str, runsession_id: int, n: int, issues_per_request: int) -> dict:
+    slx = slx_short_name(n)
+    created = EPOCH + timedelta(seconds=runsession_id * 3600 + n)
+    issues = [
+        {
+            "id": runsession_id * 100000 + n * 100 + k,
+            "severity": SEVERITIES[(n + k) % len(SEVERITIES)],
+            "title": f"Pod `{slx}-pod-{k}` in namespace `ns-{n % 25}` is restarting",
+            "nextSteps": "Inspect the pod logs",
+            "details": "{}",
+            "closed": (n + k) % 4 == 0,
+        }
+        for k in range(issues_per_request)
+    ]
+    return {
+        "id": runsession_id * 100000 + n,
+        "slxName": f"{workspace}--{slx}",
+        "resolvedTaskTitles": "||".join(make_tasks(slx)),
+        "created": created.isoformat().replace("+00:00", "Z"),
+        "fromSearchQuery": "Cart service is down" if n == 0 else None,
+        "fromIssue": None,
+        "requester": "bench@workspaces.runwhen.com" if n % 2 else "user@example.com",
+        "persona": {"spec": {"fullName": "Eager Edgar"}},
+        "issues": issues,
+        "memo": [{"bench": {"runRequest": n}}],
+    }
+
+
+def make_runsession(workspace: str, runsession_id: int, run_requests: int, issues_per_request: int = 2) -> dict:
+    """Build a synthetic RunSession document (also used directly by the benchmarks)."""
+    return {
+        "id": runsession_id,
+        "name": f"automated-systest-{runsession_id}",
+        "active": True,
+        "created": (EPOCH + timedelta(seconds=runsession_id * 3600)).isoformat().replace("+00:00", "Z"),
+        "notes": json.dumps({"runsessionId": runsession_id}),
+        "runRequests": [
+            make_run_request(workspace, runsession_id, n, issues_per_request)
+            for n in range(run_requests)
+        ],
+    }
+
+
+class _RunSessionState:
+    __slots__ = ("workspace", "target", "polls", "active", "extra", "created")
+
+    def __init__(self, workspace: str, target: int):
+        self.workspace = workspace
+        self.target = target
+        self.polls = 0
+        self.active = True
+        self.extra = []
+        self.created = time.time()
+
+
+class FakePapi:
+    """The stand-in server. Use start()/stop(), or as a context manager."""
+
+    def __init__(self, config: FakePapiConfig = None):
+        self.config = config or FakePapiConfig()
+        self.requests_served = 0
+        self._random = random.Random(self.config.seed)
+        self._runsessions = {}
+        self._ids = itertools.count(1000)
+        self._lock = threading.Lock()
+        self._server = None
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        handler = type("Handler", (_Handler,), {"papi": self})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.url
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/v3"
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # -- request handling ----------------------------------------------------
+
+    def handle(self, method: str, path: str, query: dict, body, host: str):
+        """Return (status, payload) for a request."""
+        with self._lock:
+            self.requests_served += 1
+            delay = self.config.latency + self._random.uniform(0, self.config.jitter)
+            fail = self._random.random() < self.config.error_rate
+        if delay:
+            time.sleep(delay)
+        if fail:
+            return self.config.error_status, {"detail": "Injected error"}
+
+        match = re.match(r"^/api/v3/workspaces/([^/]+)/(.*)$", path)
+        if not match:
+            return 404, {"detail": "Not found"}
+        workspace, rest = match.groups()
+        rest = rest.rstrip("/")
+
+        if method == "GET" and rest == "slxs":
+            return 200, self._slx_page(workspace, query, host, path)
+        if method == "GET" and re.fullmatch(r"slxs/[^/]+", rest):
+            return self._slx(workspace, rest.split("/")[1])
+        if method == "GET" and re.fullmatch(r"slxs/[^/]+/runbook", rest):
+            slx = rest.split("/")[1]
+            return 200, {"name": slx, "status": {"codeBundle": {"tasks": make_tasks(slx)}}}
+        if method == "GET" and rest == "branches/main/workspace.yaml":
+            return 200, {"asJson": self._workspace_yaml(workspace)}
+        if method == "GET" and rest == "index-status":
+            return 200, {"status": {"indexingStatus": "green"}, "indexedSlxs": workspace_size(workspace, self.config.slx_count)}
+        if method == "POST" and rest == "task-search":
+            return 200, self._task_search(workspace, body or {})
+        if method == "GET" and rest == "runsessions":
+            return 200, self._runsession_page(workspace, query, host, path)
+        if method == "POST" and rest == "runsessions":
+            return 201, self._create_runsession(workspace, body or {})
+        if re.fullmatch(r"runsessions/\d+", rest):
+            runsession_id = int(rest.split("/")[1])
+            if method == "GET":
+                return self._get_runsession(workspace, runsession_id)
+            if method == "PATCH":
+                return self._patch_runsession(workspace, runsession_id, body or {})
+        return 404, {"detail": "Not found"}
+
+    def _slx_page(self, workspace, query, host, path):
+        total = workspace_size(workspace, self.config.slx_count)
+        page = int(query.get("page", ["1"])[0])
+        page_size = int(query.get("page_size", [self.config.page_size])[0])
+        if "modified_after" in query:
+            # Synthetic SLXs never change after EPOCH.
+            return {"count": 0, "next": None, "previous": None, "results": []}
+        start = (page - 1) * page_size
+        results = [make_slx(workspace, i) for i in range(start, min(total, start + page_size))]
+        next_url = None
+        if start + page_size < total:
+            next_url = f"http://{host}{path}?page={page + 1}&page_size={page_size}"
+        return {"count": total, "next": next_url, "previous": None, "results": results}
+
+    def _slx(self, workspace, short_name):
+        match = re.fullmatch(r"slx-(\d+)", short_name)
+        if not match or int(match.group(1)) >= workspace_size(workspace, self.config.slx_count):
+            return 404, {"detail": "Not found"}
+        return 200, make_slx(workspace, int(match.group(1)))
+
+    def _workspace_yaml(self, workspace):
+        total = workspace_size(workspace, self.config.slx_count)
+        size = self.config.group_size
+        groups = [
+            {"name": f"group-{g}", "slxs": [slx_short_name(i) for i in range(g * size, min(total, (g + 1) * size))]}
+            for g in range((total + size - 1) // size)
+        ]
+        return {"kind": "Workspace", "metadata": {"name": workspace}, "spec": {"slxGroups": groups}}
+
+    def _task_search(self, workspace, body):
+        query = " ".join(body.get("query") or [])
+        persona = body.get("persona") or ""
+        scope = body.get("scope") or [slx_short_name(i) for i in range(
+            min(self.config.search_slxs, workspace_size(workspace, self.config.slx_count))
+        )]
+        tasks = []
+        for slx in scope:
+            for title in make_tasks(slx)[:self.config.tasks_per_slx]:
+                tasks.append({
+                    "score": round(_stable_fraction(query, persona, slx, title), 4),
+                    "workspaceTask": {
+                        "slxShortName": slx,
+                        "unresolvedTitle": title,
+                        "resolvedTitle": title,
+                    },
+                })
+        tasks.sort(key=lambda task: task["score"], reverse=True)
+        return {"tasks": tasks, "links": [], "owners": []}
+
+    def _runsession_page(self, workspace, query, host, path):
+        total = self.config.runsession_history
+        page = int(query.get("page", ["1"])[0])
+        page_size = int(query.get("page_size", ["20"])[0])
+        start = (page - 1) * page_size
+        # Newest first; ids count down from the most recent.
+        results = [
+            make_runsession(workspace, total - i, self.config.run_requests, self.config.issues_per_request)
+            for i in range(start, min(total, start + page_size))
+        ]
+        next_url = None
+        if start + page_size < total:
+            next_url = f"http://{host}{path}?page={page + 1}&page_size={page_size}"
+        return {"count": total, "next": next_url, "previous": None, "results": results}
+
+    def _create_runsession(self, workspace, body):
+        requested = body.get("runRequests") or []
+        runsession_id = next(self._ids)
+        state = _RunSessionState(workspace, max(len(requested), self.config.run_requests))
+        with self._lock:
+            self._runsessions[runsession_id] = state
+        data = make_runsession(workspace, runsession_id, 0)
+        data["runRequests"] = []
+        data["personaShortName"] = body.get("personaShortName")
+        return data
+
+    def _get_runsession(self, workspace, runsession_id):
+        with self._lock:
+            state = self._runsessions.get(runsession_id)
+            if state is None:
+                # Unknown ids behave like completed historical sessions.
+                return 200, make_runsession(workspace, runsession_id, self.config.run_requests, self.config.issues_per_request)
+            state.polls += 1
+            visible = min(state.target, state.polls * self.config.growth)
+            active = state.active
+            extra = list(state.extra)
+        data = make_runsession(workspace, runsession_id, visible, self.config.issues_per_request)
+        data["runRequests"].extend(extra)
+        data["active"] = active
+        return 200, data
+
+    def _patch_runsession(self, workspace, runsession_id, body):
+        with self._lock:
+            state = self._runsessions.setdefault(runsession_id, _RunSessionState(workspace, self.config.run_requests))
+            if body.get("active") is False:
+                state.active = False
+            for n, rr in enumerate(body.get("runRequests") or [], start=len(state.extra)):
+                state.extra.append(dict(rr, id=runsession_id * 100000 + 90000 + n, issues=[]))
+        return 200, {"id": runsession_id, "active": state.active}
+
+    # -- inspection helpers for benchmarks and CI ---------------------------
+
+    def runsession_states(self) -> dict:
+        with self._lock:
+            return {
+                runsession_id: {"active": s.active, "polls": s.polls, "target": s.target, "created": s.created}
+                for runsession_id, s in self._runsessions.items()
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    papi = None
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, keep-alive
+    # clients see ~40ms delayed-ACK stalls on every response.
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _dispatch(self, method):
+        parsed = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            body = json.loads(raw) if raw else None
+        except json.JSONDecodeError:
+            self._send(400, {"detail": "Invalid JSON"})
+            return
+        status, payload = self.papi.handle(
+            method, parsed.path, parse_qs(parsed.query), body, self.headers.get("Host", "")
+        )
+        self._send(status, payload)
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    defaults = FakePapiConfig()
+    parser.add_argument("--slxs", type=int, default=defaults.slx_count, help="SLXs per workspace")
+    parser.add_argument("--page-size", type=int, default=defaults.page_size)
+    parser.add_argument("--run-requests", type=int, default=defaults.run_requests)
+    parser.add_argument("--growth", type=int, default=defaults.growth, help="runRequests added per poll")
+    parser.add_argument("--issues-per-request", type=int, default=defaults.issues_per_request)
+    parser.add_argument("--history", type=int, default=defaults.runsession_history, help="RunSessions in the listing")
+    parser.add_argument("--latency", type=float, default=defaults.latency, help="seconds per response")
+    parser.add_argument("--jitter", type=float, default=defaults.jitter)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--error-status", type=int, default=defaults.error_status)
+    args = parser.parse_args(argv)
+
+    papi = FakePapi(FakePapiConfig(
+        slx_count=args.slxs, page_size=args.page_size, run_requests=args.run_requests,
+        growth=args.growth, issues_per_request=args.issues_per_request,
+        runsession_history=args.history, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, error_status=args.error_status,
+    ))
+    url = papi.start(args.host, args.port)
+    print(f"Fake PAPI listening on {url}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        papi.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,49 @@
-from .systest import *
+import importlib, os
+
+# Keyword modules are imported on first attribute access rather than with the
+# package, so importing one private module (e.g. `from RW.Systest import
+# _state`) doesn't load every feature. This is not lazy keyword loading:
+# Robot reads `__all__` when it imports the library, which imports every
+# keyword module up front and exposes the same names as star imports.
+_KEYWORD_MODULES = (
+    "systest", "records", "inventory", "instrumentation", "cassette",
+    "loadtest", "checkpoint", "analytics", "archive", "probes", "personas",
+)
+
+
+def _public_names(module) -> list:
+    names = getattr(module, "__all__", None)
+    if names is None:
+        names = [name for name in vars(module) if not name.startswith("_")]
+    return list(names)
+
+
+def __getattr__(name: str):
+    if name == "__all__":
+        names = {}
+        for module_name in _KEYWORD_MODULES:
+            module = importlib.import_module(f".{module_name}", __name__)
+            names.update(dict.fromkeys(_public_names(module)))
+        globals()["__all__"] = list(names)
+        return globals()["__all__"]
+    if name in _KEYWORD_MODULES:
+        return importlib.import_module(f".{name}", __name__)
+    if not name.startswith("_"):
+        # Later modules win, as they did with star imports.
+        for module_name in reversed(_KEYWORD_MODULES):
+            module = importlib.import_module(f".{module_name}", __name__)
+            if name in _public_names(module):
+                value = getattr(module, name)
+                globals()[name] = value
+                return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__getattr__("__all__")))
+
+
+# Opt-in keyword profiling; nothing is registered unless RW_SYSTEST_PROFILE is set.
+if os.getenv("RW_SYSTEST_PROFILE", "").strip().lower() in ("1", "true", "yes", "on"):
+    from .profiler import KeywordProfiler
+    ROBOT_LIBRARY_LISTENER = KeywordProfiler()
@@ -0,0 +1,107 @@
+"""
+Severity alerts for issues that arrive while a RunSession is being polled.
+
+A `SeverityWatch` is handed every poll of a RunSession. It remembers which
+issues it has already seen, so each issue is inspected once, and queues an
+alert for every new open issue at or above the configured severity (1 is the
+most severe). Robot keywords can only run on the main thread, so alerts are
+raised (`RW.Core.Add Issue` and/or `RW.Core.Push Metric`) straight away when
+polling happens there, and otherwise wait for the main thread to `flush()`.
+"""
+
+import threading
+from collections import deque
+from robot.api import logger as robot_logger
+from robot.libraries.BuiltIn import BuiltIn
+
+ALERT_ACTIONS = ("issue", "metric", "both")
+
+
+class SeverityWatch:
+
+    def __init__(
+        self,
+        rw_workspace: str,
+        runsession_id: int,
+        rw_api_url: str,
+        max_severity: int,
+        action: str = "issue",
+        stop: bool = False,
+        sub_name: str = "severe_issues"
+    ):
+        if action not in ALERT_ACTIONS:
+            raise ValueError(f"Unknown alert action {action!r}; expected one of {ALERT_ACTIONS}.")
+        self.rw_workspace = rw_workspace
+        self.runsession_id = runsession_id
+        self.runsession_url = f"{rw_api_url}/workspaces/{rw_workspace}/runsessions/{runsession_id}"
+        self.max_severity = int(max_severity)
+        self.action = action
+        self.stop = stop
+        self.sub_name = sub_name
+        self.alerts = []
+        self._seen = set()
+        self._pending = deque()
+        self._raised = 0
+
+    def _is_severe(self, issue: dict) -> bool:
+        try:
+            return int(issue.get("severity")) <= self.max_severity
+        except (TypeError, ValueError):
+            return False
+
+    def inspect(self, session_data: dict) -> bool:
+        """
+        Queue alerts for the severe issues that are new since the last poll.
+        Usable as the `on_poll` hook of the RunSession poller: returns True
+        when the wait should stop early.
+        """
+        new = []
+        for run_request in session_data.get("runRequests", []):
+            for issue in run_request.get("issues", []):
+                key = issue.get("id") or (run_request.get("id"), issue.get("title"))
+                if key in self._seen:
+                    continue
+                self._seen.add(key)
+                if issue.get("closed", False) or not self._is_severe(issue):
+                    continue
+                new.append({
+                    "slxName": run_request.get("slxName"),
+                    "runRequestId": run_request.get("id"),
+                    "severity": int(issue["severity"]),
+                    "title": issue.get("title") or "",
+                    "nextSteps": issue.get("nextSteps") or "",
+                })
+        if new:
+            self.alerts.extend(new)
+            self._pending.extend(new)
+            robot_logger.info(
+                f"{len(new)} new issues of severity {self.max_severity} or worse in RunSession {self.runsession_id}"
+            )
+        if threading.current_thread() is threading.main_thread():
+            self.flush()
+        return bool(self.stop and self.alerts)
+
+    def flush(self) -> int:
+        """Raise the queued alerts; must be called on the main thread. Returns how many were raised."""
+        raised = 0
+        while self._pending:
+            alert = self._pending.popleft()
+            raised += 1
+            if self.action in ("issue", "both"):
+                BuiltIn().run_keyword(
+                    "RW.Core.Add Issue",
+                    f"severity={alert['severity']}",
+                    f"title=Severity {alert['severity']} issue in RunSession {self.runsession_id}: {alert['title']}",
+                    f"expected=RunSession tasks in `{self.rw_workspace}` should not raise issues of severity {self.max_severity} or worse",
+                    f"actual={alert['title']} (SLX `{alert['slxName']}`)",
+                    f"reproduce_hint=Review the RunSession at {self.runsession_url}",
+                    f"next_steps={alert['nextSteps'] or 'Review the RunSession'}",
+                    f"details=Raised while the RunSession was still running, from runRequest {alert['runRequestId']}.",
+                )
+        if raised and self.action in ("metric", "both"):
+            self._raised += raised
+            BuiltIn().run_keyword("RW.Core.Push Metric", self._raised, f"sub_name={self.sub_name}")
+        return raised
+
+    def summary(self) -> dict:
+        return {"maxSeverity": self.max_severity, "count": len(self.alerts), "alerts": list(self.alerts)}
@@ -0,0 +1,8 @@
+"""
+The SLX caches used by RW.Systest. The registry lives in `RW._slx_caches`, so
+an inventory diff here also reaches the caches of the other RW libraries.
+"""
+
+from RW._slx_caches import get_cache, invalidate
+
+TASK_SEARCH_MEMO = get_cache("task-search")
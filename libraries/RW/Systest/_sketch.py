@@ -0,0 +1,72 @@
+"""
+Fixed-memory frequency estimates for the RunSession history analytics.
+
+`CountMinSketch` estimates how often each item was seen using depth x width
+counters, whatever the number of distinct items; estimates never undercount
+and overcount by at most ~e/width of the total with high probability.
+`TopK` keeps the k items with the highest estimates next to a sketch, so the
+heavy hitters of a stream can be reported without storing every item.
+"""
+
+from array import array
+
+_MASK = (1 << 64) - 1
+
+
+class CountMinSketch:
+    __slots__ = ("width", "depth", "total", "_rows")
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        if width < 1 or depth < 1:
+            raise ValueError("CountMinSketch width and depth must be positive.")
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self._rows = [array("L", bytes(array("L").itemsize * width)) for _ in range(depth)]
+
+    def _indexes(self, item: str):
+        # Double hashing (Kirsch-Mitzenmacher): one hash gives every row's index.
+        h = hash(item) & _MASK
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, item: str, count: int = 1) -> int:
+        """Count `item` and return its updated estimate."""
+        self.total += count
+        estimate = None
+        for row, index in zip(self._rows, self._indexes(item)):
+            row[index] += count
+            estimate = row[index] if estimate is None else min(estimate, row[index])
+        return estimate
+
+    def estimate(self, item: str) -> int:
+        return min(row[index] for row, index in zip(self._rows, self._indexes(item)))
+
+
+class TopK:
+    """The k items with the highest count-min estimates seen so far."""
+
+    __slots__ = ("k", "sketch", "_top")
+
+    def __init__(self, k: int = 10, width: int = 2048, depth: int = 4):
+        self.k = k
+        self.sketch = CountMinSketch(width, depth)
+        self._top = {}
+
+    def add(self, item: str, count: int = 1) -> None:
+        estimate = self.sketch.add(item, count)
+        if item in self._top or len(self._top) < self.k:
+            self._top[item] = estimate
+            return
+        smallest = min(self._top, key=self._top.get)
+        if estimate > self._top[smallest]:
+            del self._top[smallest]
+            self._top[item] = estimate
+
+    def items(self) -> list:
+        """[(item, estimate)] in descending order of estimate (ties by item)."""
+        return sorted(self._top.items(), key=lambda pair: (-pair[1], pair[0]))
+
+    @property
+    def total(self) -> int:
+        return self.sketch.total
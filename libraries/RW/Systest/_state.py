@@ -0,0 +1,58 @@
+"""
+Helpers for locating and persisting files written by the Systest keywords.
+
+Artifacts are per-run files that belong next to the Robot output. State files
+must survive between runs (snapshots, checkpoints), so they live in a
+configurable state directory instead.
+"""
+
+import json, os
+from robot.libraries.BuiltIn import BuiltIn, RobotNotRunningError
+
+from RW import _codec
+
+STATE_DIR_ENV = "RW_SYSTEST_STATE_DIR"
+DEFAULT_STATE_DIR = "/tmp/runwhen/systest"
+
+
+def artifact_path(filename: str) -> str:
+    """
+    Resolve an artifact filename against the Robot output directory, falling
+    back to the current working directory when Robot is not running.
+    """
+    if os.path.isabs(filename):
+        return filename
+    try:
+        output_dir = BuiltIn().get_variable_value("${OUTPUT DIR}")
+    except RobotNotRunningError:
+        output_dir = None
+    return os.path.join(output_dir or os.getcwd(), filename)
+
+
+def state_path(filename: str) -> str:
+    """
+    Resolve a state filename against RW_SYSTEST_STATE_DIR (default
+    /tmp/runwhen/systest), creating the directory if needed.
+    """
+    if os.path.isabs(filename):
+        return filename
+    state_dir = os.getenv(STATE_DIR_ENV) or DEFAULT_STATE_DIR
+    os.makedirs(state_dir, exist_ok=True)
+    return os.path.join(state_dir, filename)
+
+
+def read_json(path: str, default=None):
+    """Load a JSON state file, returning `default` if it is missing or unreadable."""
+    try:
+        with open(path, "rb") as f:
+            return _codec.loads(f.read())
+    except (OSError, json.JSONDecodeError):
+        return default
+
+
+def write_json(path: str, data) -> None:
+    """Atomically replace a JSON state file so readers never see a partial write."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(_codec.dumps(data))
+    os.replace(tmp_path, path)
@@ -0,0 +1,240 @@
+"""
+Analytics across the RunSession history of a workspace.
+
+Scope: Global
+"""
+
+from __future__ import annotations
+
+import json, math
+from concurrent import futures
+from datetime import datetime, timezone
+from robot.api import logger as robot_logger
+
+from RW import _codec, _http, _lazy, _timings
+from . import _sketch
+from .systest import _issue_resources
+
+requests = _lazy.LazyModule("requests")
+platform = _lazy.LazyModule("RW.platform")
+
+
+def _parse_timestamp(value) -> float:
+    """Seconds since the epoch for an API timestamp ("2025-01-01T00:00:00Z"), or None."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class _WindowedTopK:
+    """One TopK sketch per fixed time window, plus one for the whole history."""
+
+    def __init__(self, window_seconds: float, k: int, width: int, depth: int):
+        self.window_seconds = window_seconds
+        self.k, self.width, self.depth = k, width, depth
+        self.overall = _sketch.TopK(k, width, depth)
+        self.windows = {}
+        self.sessions = {}
+
+    def add_session(self, runsession: dict, open_only: bool) -> int:
+        session_ts = _parse_timestamp(runsession.get("created"))
+        counted = 0
+        for run_request in runsession.get("runRequests", []):
+            ts = _parse_timestamp(run_request.get("created")) or session_ts
+            window = None
+            if ts is not None:
+                start = math.floor(ts / self.window_seconds) * self.window_seconds
+                window = self.windows.get(start)
+                if window is None:
+                    window = self.windows[start] = _sketch.TopK(self.k, self.width, self.depth)
+            for issue in run_request.get("issues", []):
+                if open_only and issue.get("closed", False):
+                    continue
+                counted += 1
+                for resource in _issue_resources(issue):
+                    self.overall.add(resource)
+                    if window is not None:
+                        window.add(resource)
+        if session_ts is not None:
+            start = math.floor(session_ts / self.window_seconds) * self.window_seconds
+            self.sessions[start] = self.sessions.get(start, 0) + 1
+        return counted
+
+
+def _fetch_runsession_page(url: str, headers: dict, params: dict) -> dict:
+    response = _http.request("GET", url, headers=headers, params=params, timeout=30)
+    response.raise_for_status()
+    return _codec.response_json(response)
+
+
+@_timings.phase("runsession_history")
+def get_runsession_resource_trends(
+    rw_api_url: str,
+    api_token: platform.Secret,
+    rw_workspace: str,
+    max_sessions: int = 200,
+    lookback_hours: float = None,
+    window_hours: float = 24,
+    top_k: int = 10,
+    chronic_min_windows: int = 3,
+    open_only: bool = False,
+    page_size: int = 20,
+    max_workers: int = 4,
+    sketch_width: int = 2048,
+    sketch_depth: int = 4
+) -> dict:
+    """
+    Find the resources referenced most often in issue titles (the backticked
+    names, as in `Get Most Referenced Resource`) across the recent RunSessions
+    of a workspace, per time window.
+
+    The RunSession listing (newest first) is fetched `max_workers` pages at a
+    time. Pages are reduced in page order, each one as soon as it and every
+    page before it have arrived, and then dropped; paging stops at the first
+    session past `max_sessions` or `lookback_hours`. Counts
+    are kept in a count-min sketch with a top-k list per window, so memory
+    depends on the number of windows, not on the number of sessions or
+    distinct resources. Counts are estimates that can only overcount, by
+    roughly `e / sketch_width` of the references in a window.
+
+    A resource is reported as chronic when it is in the top-k of at least
+    `chronic_min_windows` windows.
+
+    :param rw_api_url: Base URL to the RunWhen API.
+    :param api_token: A platform.Secret token containing your bearer token.
+    :param rw_workspace: Short name of the workspace.
+    :param max_sessions: Read at most this many of the most recent RunSessions.
+    :param lookback_hours: Ignore RunSessions older than this, and stop paging once reached (optional).
+    :param window_hours: Length of each time window.
+    :param top_k: Resources reported per window and overall.
+    :param chronic_min_windows: Top-k appearances needed to count as chronic.
+    :param open_only: Only count issues that are not closed.
+    :param page_size: RunSessions per listing page.
+    :param max_workers: Listing pages fetched concurrently.
+    :param sketch_width: Counters per sketch row; larger is more accurate.
+    :param sketch_depth: Sketch rows (hash functions).
+    :return: A dict of the form:
+             {
+               "sessions": <n>, "issues": <n>, "references": <n>,
+               "top": [{"resource", "count", "windows"}],
+               "windows": [{"start": "<ISO time>", "sessions", "references", "top": [{"resource", "count"}]}],
+               "chronic": [{"resource", "windows", "count"}],
+               "errors": ["<page>: <message>"]
+             }
+    """
+    url = f"{rw_api_url}/workspaces/{rw_workspace}/runsessions"
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_token.value}"
+    }
+    page_size = max(1, int(page_size))
+    max_workers = max(1, int(max_workers))
+    max_sessions = int(max_sessions) if max_sessions else None
+    cutoff = None
+    if lookback_hours:
+        cutoff = datetime.now(timezone.utc).timestamp() - float(lookback_hours) * 3600
+    trends = _WindowedTopK(float(window_hours) * 3600, int(top_k), int(sketch_width), int(sketch_depth))
+    totals = {"sessions": 0, "issues": 0}
+    errors = []
+
+    def _reduce(page_number: int, payload: dict) -> bool:
+        """Count a page; return False once paging should stop."""
+        first_index = (page_number - 1) * page_size
+        for offset, runsession in enumerate(payload.get("results", [])):
+            if max_sessions and first_index + offset >= max_sessions:
+                return False
+            created = _parse_timestamp(runsession.get("created"))
+            if cutoff is not None and created is not None and created < cutoff:
+                return False
+            totals["sessions"] += 1
+            totals["issues"] += trends.add_session(runsession, open_only)
+        return True
+
+    first = _fetch_runsession_page(url, headers, {"page": 1, "page_size": page_size})
+    keep_going = _reduce(1, first)
+    count = first.get("count")
+    if count is None:
+        # No total to plan concurrent requests with; follow the next links instead.
+        next_url, page_number = first.get("next"), 1
+        while keep_going and next_url:
+            page_number += 1
+            payload = _fetch_runsession_page(next_url, headers, None)
+            keep_going = _reduce(page_number, payload)
+            next_url = payload.get("next")
+    elif keep_going:
+        wanted = min(count, max_sessions) if max_sessions else count
+        pages = iter(range(2, math.ceil(wanted / page_size) + 1))
+        # Pages complete in any order but are reduced in page order, so the cutoff is only
+        # applied once every newer page has been counted. Fetched and buffered pages
+        # together stay under 2x max_workers.
+        with futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+            pending, arrived, next_page = {}, {}, 2
+            while True:
+                while keep_going and len(pending) + len(arrived) < max_workers * 2:
+                    page_number = next(pages, None)
+                    if page_number is None:
+                        break
+                    params = {"page": page_number, "page_size": page_size}
+                    pending[pool.submit(_fetch_runsession_page, url, headers, params)] = page_number
+                if not pending:
+                    break
+                done, _ = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    arrived[pending.pop(future)] = future
+                while keep_going and next_page in arrived:
+                    future = arrived.pop(next_page)
+                    try:
+                        keep_going = _reduce(next_page, future.result())
+                    except (requests.RequestException, json.JSONDecodeError) as e:
+                        errors.append(f"page {next_page}: {e}")
+                    next_page += 1
+                if not keep_going:
+                    # Everything still pending or buffered is past the cutoff.
+                    for future in pending:
+                        future.cancel()
+                    pending.clear()
+                    arrived.clear()
+
+    windows = []
+    appearances = {}
+    for start in sorted(trends.windows):
+        top = trends.windows[start].items()
+        for resource, _ in top:
+            appearances[resource] = appearances.get(resource, 0) + 1
+        windows.append({
+            "start": datetime.fromtimestamp(start, timezone.utc).isoformat().replace("+00:00", "Z"),
+            "sessions": trends.sessions.get(start, 0),
+            "references": trends.windows[start].total,
+            "top": [{"resource": resource, "count": count} for resource, count in top],
+        })
+    chronic = sorted(
+        (
+            {"resource": resource, "windows": n, "count": trends.overall.sketch.estimate(resource)}
+            for resource, n in appearances.items() if n >= chronic_min_windows
+        ),
+        key=lambda entry: (-entry["windows"], -entry["count"], entry["resource"]),
+    )
+    result = {
+        "sessions": totals["sessions"],
+        "issues": totals["issues"],
+        "references": trends.overall.total,
+        "top": [
+            {"resource": resource, "count": count, "windows": appearances.get(resource, 0)}
+            for resource, count in trends.overall.items()
+        ],
+        "windows": windows,
+        "chronic": chronic,
+        "errors": errors,
+    }
+    robot_logger.info(
+        f"Resource references in {result['sessions']} RunSessions of '{rw_workspace}': "
+        f"{result['references']} references in {result['issues']} issues over {len(windows)} windows, "
+        f"{len(chronic)} chronic resources, {len(errors)} page errors"
+    )
+    return result
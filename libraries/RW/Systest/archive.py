@@ -0,0 +1,302 @@
+"""
+Append-only archive of systest outcomes, for trend queries across runs.
+
+Each SLI run appends one compact row: score, RunSession ID, visited SLXs,
+phase totals and issue fingerprints. Phase totals also go to a narrow side
+table, so latency trends are read from an index instead of decoding every
+row. The archive is a SQLite file in the state directory (or
+RW_SYSTEST_ARCHIVE). Rows are only ever inserted.
+
+Scope: Global
+"""
+
+from __future__ import annotations
+
+import hashlib, os, time
+from datetime import datetime, timezone
+from typing import Union
+from robot.api import logger as robot_logger
+
+from RW import _codec, _lazy, _timings
+from . import _state
+from .systest import _normalize_task_title, get_visited_slx_and_tasks_from_runsession
+
+sqlite3 = _lazy.LazyModule("sqlite3")
+
+ARCHIVE_ENV = "RW_SYSTEST_ARCHIVE"
+DEFAULT_ARCHIVE_FILENAME = "systest_archive.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id            INTEGER PRIMARY KEY,
+    ts            REAL    NOT NULL,
+    workspace     TEXT    NOT NULL,
+    query         TEXT    NOT NULL,
+    suite         TEXT,
+    score         REAL,
+    runsession_id INTEGER,
+    visited       TEXT,
+    issues        TEXT,
+    phases        TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_by_query ON runs (workspace, query, ts);
+CREATE INDEX IF NOT EXISTS runs_by_query_only ON runs (query, ts);
+CREATE INDEX IF NOT EXISTS runs_by_time  ON runs (ts);
+CREATE TABLE IF NOT EXISTS run_phases (
+    run_id    INTEGER NOT NULL REFERENCES runs (id),
+    ts        REAL    NOT NULL,
+    workspace TEXT    NOT NULL,
+    query     TEXT    NOT NULL,
+    phase     TEXT    NOT NULL,
+    seconds   REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS run_phases_by_query ON run_phases (workspace, query, phase, ts);
+CREATE INDEX IF NOT EXISTS run_phases_by_query_only ON run_phases (phase, query, ts);
+CREATE INDEX IF NOT EXISTS run_phases_by_time  ON run_phases (phase, ts);
+CREATE TRIGGER IF NOT EXISTS runs_append_only_update BEFORE UPDATE ON runs
+    BEGIN SELECT RAISE(ABORT, 'the systest archive is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS runs_append_only_delete BEFORE DELETE ON runs
+    BEGIN SELECT RAISE(ABORT, 'the systest archive is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS run_phases_append_only_update BEFORE UPDATE ON run_phases
+    BEGIN SELECT RAISE(ABORT, 'the systest archive is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS run_phases_append_only_delete BEFORE DELETE ON run_phases
+    BEGIN SELECT RAISE(ABORT, 'the systest archive is append-only'); END;
+"""
+
+
+def _archive_path(archive_path: str = None) -> str:
+    if archive_path:
+        return archive_path if os.path.isabs(archive_path) else _state.state_path(archive_path)
+    return os.getenv(ARCHIVE_ENV) or _state.state_path(DEFAULT_ARCHIVE_FILENAME)
+
+
+def _connect(archive_path: str = None):
+    connection = sqlite3.connect(_archive_path(archive_path), timeout=30)
+    # WAL lets trend queries read while an SLI run appends.
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+def _issue_fingerprint(slx_name: str, issue: dict) -> str:
+    """Stable id for an issue across runs: SLX, severity and normalised title."""
+    key = f"{slx_name}|{issue.get('severity')}|{_normalize_task_title(issue.get('title') or '')}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _scope(since: float, rw_workspace: str = None, query: str = None) -> tuple:
+    """WHERE clause and parameters; equality columns first, so the composite indexes apply."""
+    clauses, params = [], []
+    if rw_workspace:
+        clauses.append("workspace = ?")
+        params.append(rw_workspace)
+    if query:
+        clauses.append("query = ?")
+        params.append(query)
+    clauses.append("ts >= ?")
+    params.append(since)
+    return " AND ".join(clauses), params
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def archive_systest_run(
+    rw_workspace: str,
+    query: str,
+    score: Union[float, None],
+    runsession_data: Union[str, dict] = None,
+    runsession_id: int = None,
+    suite: str = None,
+    archive_path: str = None
+) -> int:
+    """
+    Append the outcome of a systest run to the archive.
+
+    The phase totals recorded so far (see `Get Systest Timings`) are stored
+    with the run. The SLXs visited and the open issue fingerprints are taken
+    from `runsession_data`.
+
+    :param rw_workspace: Short name of the workspace.
+    :param query: The task search query that was validated.
+    :param score: The run's score (e.g. the SLI metric, 0 to 1), or None if the run was not scored.
+    :param runsession_data: The last RunSession JSON, if one was created (optional).
+    :param runsession_id: The RunSession ID (default: taken from runsession_data).
+    :param suite: A label for the suite that produced the run (e.g. "sli").
+    :param archive_path: SQLite file (default: RW_SYSTEST_ARCHIVE, or systest_archive.sqlite3 in the state dir).
+    :return: The archived row id.
+    """
+    runsession = _codec.as_object(runsession_data) if runsession_data else {}
+    visited = sorted(filter(None, get_visited_slx_and_tasks_from_runsession(runsession)))
+    fingerprints = sorted({
+        _issue_fingerprint(run_request.get("slxName") or "", issue)
+        for run_request in runsession.get("runRequests", [])
+        for issue in run_request.get("issues", [])
+        if not issue.get("closed", False)
+    })
+    phases = {name: series["total"] for name, series in _timings.snapshot()["phases"].items()}
+    ts = time.time()
+
+    connection = _connect(archive_path)
+    try:
+        with connection:
+            cursor = connection.execute(
+                "INSERT INTO runs (ts, workspace, query, suite, score, runsession_id, visited, issues, phases)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    ts, rw_workspace, query, suite, None if score is None else float(score),
+                    runsession_id or runsession.get("id"),
+                    _codec.dumps(visited), _codec.dumps(fingerprints), _codec.dumps(phases),
+                ),
+            )
+            run_id = cursor.lastrowid
+            connection.executemany(
+                "INSERT INTO run_phases (run_id, ts, workspace, query, phase, seconds) VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, ts, rw_workspace, query, phase, seconds) for phase, seconds in phases.items()],
+            )
+    finally:
+        connection.close()
+    robot_logger.info(
+        f"Archived systest run {run_id}: score {score}, {len(visited)} SLXs visited, "
+        f"{len(fingerprints)} open issues, {len(phases)} phases"
+    )
+    return run_id
+
+
+def get_systest_pass_rate(
+    rw_workspace: str = None,
+    query: str = None,
+    days: float = 7,
+    pass_score: float = 1.0,
+    archive_path: str = None
+) -> dict:
+    """
+    Pass rate of archived runs over the last `days`, overall and per UTC day.
+    Runs archived without a score count as failed.
+
+    :param rw_workspace: Limit to one workspace (optional).
+    :param query: Limit to one query, in every workspace unless rw_workspace is given (optional).
+    :param days: How far back to look.
+    :param pass_score: Minimum score that counts as a pass.
+    :param archive_path: SQLite file (see `Archive Systest Run`).
+    :return: {"runs", "passed", "passRate", "byDay": [{"day", "runs", "passed", "passRate"}]}
+    """
+    where, params = _scope(time.time() - float(days) * 86400, rw_workspace, query)
+    connection = _connect(archive_path)
+    try:
+        rows = connection.execute(
+            f"SELECT CAST(ts / 86400 AS INTEGER) AS day, COUNT(*), SUM(IFNULL(score >= ?, 0))"
+            f" FROM runs WHERE {where} GROUP BY day ORDER BY day",
+            [pass_score] + params,
+        ).fetchall()
+    finally:
+        connection.close()
+    by_day = [
+        {"day": _iso(day * 86400)[:10], "runs": runs, "passed": passed, "passRate": round(passed / runs, 4)}
+        for day, runs, passed in rows
+    ]
+    runs = sum(day["runs"] for day in by_day)
+    passed = sum(day["passed"] for day in by_day)
+    return {
+        "runs": runs,
+        "passed": passed,
+        "passRate": round(passed / runs, 4) if runs else None,
+        "byDay": by_day,
+    }
+
+
+def get_systest_flakiness(
+    rw_workspace: str = None,
+    days: float = 7,
+    pass_score: float = 1.0,
+    min_runs: int = 3,
+    archive_path: str = None
+) -> list:
+    """
+    Flakiness per (workspace, query) over the last `days`: the share of
+    consecutive runs whose outcome flipped between pass and fail. A query that
+    always passes or always fails scores 0, and one that alternates scores 1.
+    Runs archived without a score count as failed.
+
+    :param rw_workspace: Limit to one workspace (optional).
+    :param days: How far back to look.
+    :param pass_score: Minimum score that counts as a pass.
+    :param min_runs: Skip queries with fewer runs in the period.
+    :param archive_path: SQLite file (see `Archive Systest Run`).
+    :return: [{"workspace", "query", "runs", "passRate", "flips", "flakiness"}], most flaky first.
+    """
+    where, params = _scope(time.time() - float(days) * 86400, rw_workspace)
+    connection = _connect(archive_path)
+    try:
+        rows = connection.execute(
+            f"""
+            SELECT workspace, query, COUNT(*), SUM(passed), SUM(passed != previous)
+            FROM (
+                SELECT workspace, query, IFNULL(score >= ?, 0) AS passed,
+                       LAG(IFNULL(score >= ?, 0)) OVER (PARTITION BY workspace, query ORDER BY ts) AS previous
+                FROM runs WHERE {where}
+            )
+            GROUP BY workspace, query HAVING COUNT(*) >= ?
+            """,
+            [pass_score, pass_score] + params + [int(min_runs)],
+        ).fetchall()
+    finally:
+        connection.close()
+    results = [
+        {
+            "workspace": workspace,
+            "query": query,
+            "runs": runs,
+            "passRate": round(passed / runs, 4),
+            "flips": flips or 0,
+            "flakiness": round((flips or 0) / (runs - 1), 4) if runs > 1 else 0.0,
+        }
+        for workspace, query, runs, passed, flips in rows
+    ]
+    results.sort(key=lambda row: (-row["flakiness"], row["workspace"], row["query"]))
+    return results
+
+
+def get_systest_latency_trend(
+    phase: str = "runsession_wait",
+    rw_workspace: str = None,
+    query: str = None,
+    days: float = 7,
+    bucket_hours: float = 24,
+    archive_path: str = None
+) -> list:
+    """
+    Per-run duration of a phase (see `Get Systest Timings`) over the last
+    `days`, aggregated into buckets of `bucket_hours`.
+
+    :param phase: Phase name, e.g. task_search, runsession_create or runsession_wait.
+    :param rw_workspace: Limit to one workspace (optional).
+    :param query: Limit to one query, in every workspace unless rw_workspace is given (optional).
+    :param days: How far back to look.
+    :param bucket_hours: Bucket length.
+    :param archive_path: SQLite file (see `Archive Systest Run`).
+    :return: [{"start", "runs", "mean", "min", "max"}] in time order, durations in seconds.
+    """
+    bucket_seconds = float(bucket_hours) * 3600
+    where, params = _scope(time.time() - float(days) * 86400, rw_workspace, query)
+    connection = _connect(archive_path)
+    try:
+        rows = connection.execute(
+            f"SELECT CAST(ts / ? AS INTEGER) AS bucket, COUNT(*), AVG(seconds), MIN(seconds), MAX(seconds)"
+            f" FROM run_phases WHERE phase = ? AND {where} GROUP BY bucket ORDER BY bucket",
+            [bucket_seconds, phase] + params,
+        ).fetchall()
+    finally:
+        connection.close()
+    return [
+        {
+            "start": _iso(bucket * bucket_seconds),
+            "runs": runs,
+            "mean": round(mean, 4),
+            "min": round(low, 4),
+            "max": round(high, 4),
+        }
+        for bucket, runs, mean, low, high in rows
+    ]
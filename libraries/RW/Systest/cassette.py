@@ -0,0 +1,50 @@
+"""
+Keywords for recording PAPI exchanges to a cassette file and replaying them,
+so a systest run can be repeated offline and without waiting on RunSessions.
+
+A cassette can also be enabled for a whole run through RW_SYSTEST_CASSETTE
+(see `_cassette` for the environment variables).
+
+Scope: Global
+"""
+
+import os
+from robot.api import logger as robot_logger
+
+from RW import _cassette
+from . import _state
+
+
+def start_http_cassette(path: str, mode: str = "replay", time_scale: float = 0.0) -> str:
+    """
+    Record every PAPI call made by the RW.Systest and RW.Workspace keywords to
+    `path`, or answer them from it.
+
+    :param path: Cassette file (.json, or .json.gz for gzip). When recording, a
+                 relative path is placed in the Robot output directory; when
+                 replaying, it is resolved against the current directory.
+    :param mode: "record" or "replay".
+    :param time_scale: During replay, factor applied to recorded latencies and
+                       polling sleeps (0 replays without any sleeping).
+    :return: The resolved cassette path.
+    """
+    mode = mode.strip().lower()
+    path = _state.artifact_path(path) if mode == "record" else os.path.abspath(path)
+    _cassette.start(path, mode, time_scale)
+    robot_logger.info(f"HTTP cassette started ({mode}): {path}")
+    return path
+
+
+def stop_http_cassette() -> dict:
+    """
+    Stop the active cassette, writing it out if recording.
+
+    :return: {"path", "mode", "interactions", "served", "misses"}, or an empty
+             dict if no cassette was active.
+    """
+    cassette = _cassette.stop()
+    if cassette is None:
+        return {}
+    summary = cassette.summary()
+    robot_logger.info(f"HTTP cassette stopped: {summary}")
+    return summary
@@ -0,0 +1,241 @@
+"""
+RunSession checkpoints, so a systest interval that runs out of time hands
+its RunSession to the next interval instead of abandoning it.
+
+One checkpoint is kept per (workspace, query) in the state directory (see
+`_state`). It records the phase, the RunSession ID and the validation SLXs
+seen so far. The next run resumes polling that RunSession. A checkpoint that
+is too old, or has been resumed too often, has its RunSession closed and a
+fresh one is started.
+
+Scope: Global
+"""
+
+from __future__ import annotations
+
+import hashlib, json, os, time
+from robot.api import logger as robot_logger
+
+from RW import _lazy, _timings
+from . import _alerts, _state
+from .systest import _poll_runsession, close_runsession, get_visited_slx_and_tasks_from_runsession
+
+requests = _lazy.LazyModule("requests")
+platform = _lazy.LazyModule("RW.platform")
+
+PHASES = ("created", "monitoring")
+
+
+def _checkpoint_path(rw_workspace: str, query: str) -> str:
+    digest = hashlib.sha1(query.encode("utf-8")).hexdigest()[:12]
+    return _state.state_path(f"runsession_checkpoint_{rw_workspace}_{digest}.json")
+
+
+def _visited_validation_slxs(rw_workspace: str, runsession_data: dict, validation_slxs: list) -> list:
+    visited = get_visited_slx_and_tasks_from_runsession(runsession_data)
+    return [
+        slx for slx in validation_slxs
+        if slx in visited or f"{rw_workspace}--{slx}" in visited
+    ]
+
+
+def save_runsession_checkpoint(
+    rw_workspace: str,
+    query: str,
+    runsession_id: int,
+    phase: str = "created",
+    validation_slxs: list = None,
+    runsession_data: dict = None
+) -> dict:
+    """
+    Record the RunSession started for (`rw_workspace`, `query`), or update the
+    existing checkpoint for it.
+
+    :param rw_workspace: Short name of the workspace.
+    :param query: The task search query the RunSession was created from.
+    :param runsession_id: The RunSession being monitored.
+    :param phase: "created" right after the RunSession is posted, "monitoring" once polling has started.
+    :param validation_slxs: SLX short names that the RunSession is expected to visit.
+    :param runsession_data: The last RunSession JSON, used to record which validation SLXs were visited so far.
+    :return: The saved checkpoint.
+    """
+    if phase not in PHASES:
+        raise ValueError(f"Checkpoint phase must be one of {PHASES}, not {phase!r}.")
+    path = _checkpoint_path(rw_workspace, query)
+    checkpoint = _state.read_json(path, default={}) or {}
+    if checkpoint.get("runsessionId") != runsession_id:
+        checkpoint = {
+            "workspace": rw_workspace,
+            "query": query,
+            "runsessionId": runsession_id,
+            "createdAt": time.time(),
+            "resumes": 0,
+            "validation": {"expected": [], "visited": []},
+        }
+    checkpoint["phase"] = phase
+    checkpoint["updatedAt"] = time.time()
+    if validation_slxs is not None:
+        checkpoint["validation"]["expected"] = list(validation_slxs)
+    if runsession_data:
+        visited = _visited_validation_slxs(rw_workspace, runsession_data, checkpoint["validation"]["expected"])
+        checkpoint["validation"]["visited"] = sorted(set(checkpoint["validation"]["visited"]) | set(visited))
+        checkpoint["runRequests"] = len(runsession_data.get("runRequests", []))
+    _state.write_json(path, checkpoint)
+    return checkpoint
+
+
+def clear_runsession_checkpoint(rw_workspace: str, query: str) -> bool:
+    """
+    Remove the checkpoint for (`rw_workspace`, `query`).
+
+    :return: True if a checkpoint was removed.
+    """
+    try:
+        os.remove(_checkpoint_path(rw_workspace, query))
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def get_runsession_checkpoint(
+    rw_workspace: str,
+    query: str,
+    rw_api_url: str,
+    api_token: platform.Secret,
+    max_age_seconds: float = 3600,
+    max_resumes: int = 3
+) -> dict:
+    """
+    Return the checkpoint to resume for (`rw_workspace`, `query`), or an empty
+    dict if a new RunSession should be created.
+
+    A checkpoint older than `max_age_seconds`, or one that has already been
+    resumed `max_resumes` times, is abandoned. Its RunSession is closed, so it
+    stops taking runners, and the checkpoint is removed. Otherwise the resume
+    count is incremented and the checkpoint is returned.
+
+    :param rw_workspace: Short name of the workspace.
+    :param query: The task search query.
+    :param rw_api_url: Base URL to the RunWhen API (used to close abandoned RunSessions).
+    :param api_token: A platform.Secret token containing your bearer token.
+    :param max_age_seconds: Maximum age of a resumable checkpoint, from RunSession creation.
+    :param max_resumes: Maximum number of times a RunSession is resumed (0: never resume).
+    :return: The checkpoint ({"runsessionId", "phase", "resumes", "validation", ...}) or {}.
+    """
+    path = _checkpoint_path(rw_workspace, query)
+    checkpoint = _state.read_json(path, default={}) or {}
+    runsession_id = checkpoint.get("runsessionId")
+    if not runsession_id:
+        return {}
+
+    age = time.time() - checkpoint.get("createdAt", 0)
+    if age <= max_age_seconds and checkpoint.get("resumes", 0) < max_resumes:
+        checkpoint["resumes"] = checkpoint.get("resumes", 0) + 1
+        _state.write_json(path, checkpoint)
+        robot_logger.info(
+            f"Resuming RunSession {runsession_id} for '{query}' in '{rw_workspace}' "
+            f"(phase {checkpoint.get('phase')}, resume {checkpoint['resumes']}/{max_resumes}, age {age:.0f}s)"
+        )
+        return checkpoint
+
+    robot_logger.info(
+        f"Abandoning RunSession {runsession_id} for '{query}' in '{rw_workspace}' "
+        f"(age {age:.0f}s, {checkpoint.get('resumes', 0)} resumes); closing it."
+    )
+    try:
+        close_runsession(rw_workspace, runsession_id, rw_api_url, api_token)
+    except (requests.RequestException, json.JSONDecodeError) as e:
+        robot_logger.warn(f"Could not close RunSession {runsession_id}: {e}")
+    clear_runsession_checkpoint(rw_workspace, query)
+    return {}
+
+
+@_timings.phase("runsession_wait")
+def wait_for_runsession_with_checkpoint(
+    rw_workspace: str,
+    query: str,
+    runsession_id: int,
+    rw_api_url: str,
+    api_token: platform.Secret,
+    poll_interval: float = 5.0,
+    max_wait_seconds: float = 300.0,
+    validation_slxs: list = None,
+    alert_severity: int = None,
+    alert_action: str = "issue",
+    stop_on_alert: bool = False
+) -> dict:
+    """
+    `Wait For RunSession Tasks To Complete`, but a timeout checkpoints the
+    RunSession for the next run instead of raising.
+
+    On completion the checkpoint is removed. On timeout it is saved in phase
+    "monitoring" with the validation SLXs visited so far. Severity alerts work
+    as in `Wait For RunSession Tasks To Complete`. A wait cut short by an
+    alert is not checkpointed, since the alert has already been raised; its
+    RunSession is closed instead, so it doesn't keep holding runners.
+
+    :param rw_workspace: Short name of the workspace.
+    :param query: The task search query the RunSession was created from.
+    :param runsession_id: The RunSession to poll.
+    :param rw_api_url: Base URL to the RunWhen API.
+    :param api_token: A platform.Secret token containing your bearer token.
+    :param poll_interval: Seconds to wait between polls.
+    :param max_wait_seconds: How long this run polls before checkpointing.
+    :param validation_slxs: SLX short names the RunSession is expected to visit.
+    :param alert_severity: Alert on new issues of this severity or worse (None or 0: no alerts).
+    :param alert_action: "issue", "metric" or "both".
+    :param stop_on_alert: Stop waiting as soon as an alert is raised.
+    :return: {"complete": bool, "stoppedOnAlert": bool, "runsession": <last RunSession JSON>,
+             "checkpoint": <saved checkpoint or {}>, "alerts": {"maxSeverity", "count", "alerts"} or None}
+    """
+    watch = None
+    if alert_severity:
+        watch = _alerts.SeverityWatch(
+            rw_workspace, runsession_id, rw_api_url, alert_severity, action=alert_action, stop=stop_on_alert,
+        )
+    return _wait_with_checkpoint(
+        rw_workspace, query, runsession_id, rw_api_url, api_token,
+        poll_interval, max_wait_seconds, validation_slxs, watch,
+    )
+
+
+def _wait_with_checkpoint(
+    rw_workspace, query, runsession_id, rw_api_url, api_token,
+    poll_interval, max_wait_seconds, validation_slxs, watch=None
+) -> dict:
+    """The body of `Wait For RunSession With Checkpoint`, with an optional `_alerts.SeverityWatch`."""
+    last = {}
+
+    def _on_poll(session_data):
+        last["data"] = session_data
+        return watch.inspect(session_data) if watch else False
+
+    try:
+        session_data = _poll_runsession(
+            rw_workspace, runsession_id, rw_api_url, api_token,
+            poll_interval=poll_interval, max_wait_seconds=max_wait_seconds, on_poll=_on_poll,
+        )
+    except TimeoutError as e:
+        checkpoint = save_runsession_checkpoint(
+            rw_workspace, query, runsession_id,
+            phase="monitoring", validation_slxs=validation_slxs, runsession_data=last.get("data"),
+        )
+        robot_logger.info(f"{e} Checkpointed for the next run: {checkpoint}")
+        return {
+            "complete": False, "stoppedOnAlert": False, "runsession": last.get("data", {}),
+            "checkpoint": checkpoint, "alerts": watch.summary() if watch else None,
+        }
+
+    stopped = bool(watch and watch.stop and watch.alerts)
+    if stopped:
+        # Nothing will resume it, so stop it from taking runners before forgetting it.
+        robot_logger.info(f"Closing RunSession {runsession_id}: the wait stopped on a severity alert.")
+        try:
+            close_runsession(rw_workspace, runsession_id, rw_api_url, api_token)
+        except (requests.RequestException, json.JSONDecodeError) as e:
+            robot_logger.warn(f"Could not close RunSession {runsession_id}: {e}")
+    clear_runsession_checkpoint(rw_workspace, query)
+    return {
+        "complete": not stopped, "stoppedOnAlert": stopped, "runsession": session_data,
+        "checkpoint": {}, "alerts": watch.summary() if watch else None,
+    }
@@ -0,0 +1,108 @@
+"""
+Keywords for phase-level latency instrumentation of the systest codebundles.
+
+Keyword phases (inventory, task_search, runsession_create, runsession_wait, ...)
+and every PAPI call are recorded automatically; these keywords add custom
+phases, publish the durations as metrics and render a summary for the report.
+
+Scope: Global
+"""
+
+import re
+from robot.libraries.BuiltIn import BuiltIn
+from robot.api import logger as robot_logger
+
+from RW import _codec, _timings
+from . import _state
+
+
+def reset_systest_timings() -> None:
+    """Clear all recorded phase and HTTP timings, e.g. at the start of a suite."""
+    _timings.reset()
+
+
+def start_systest_phase(name: str) -> None:
+    """Start timing a custom phase; finish it with `End Systest Phase`."""
+    _timings.start_phase(name)
+
+
+def end_systest_phase(name: str) -> float:
+    """Stop timing a custom phase and return its duration in seconds."""
+    seconds = _timings.end_phase(name)
+    robot_logger.info(f"Systest phase '{name}' took {seconds:.3f}s")
+    return seconds
+
+
+def get_systest_timings() -> dict:
+    """
+    Return the timings recorded so far:
+        {
+          "phases": {"<phase>": {"count", "total", "mean", "min", "max", "last", "histogram"}},
+          "http":   {"<METHOD /endpoint>": {... same fields ..., "status", "bytes", "retries", "errors"}}
+        }
+    Histogram keys are bucket upper bounds in seconds.
+    """
+    return _timings.snapshot()
+
+
+def publish_systest_phase_metrics(sub_name_prefix: str = "phase", include_http: bool = False) -> dict:
+    """
+    Push the total duration (in seconds) of each recorded phase as an extra
+    metric through `RW.Core.Push Metric`, with sub_name `<prefix>_<phase>`.
+    With `include_http`, the mean latency per endpoint is pushed as well.
+
+    :param sub_name_prefix: Prefix for the metric sub names.
+    :param include_http: Also push per-endpoint mean latencies.
+    :return: A dict of the pushed sub names and values.
+    """
+    timings = _timings.snapshot()
+    pushed = {}
+    for name, series in timings["phases"].items():
+        pushed[f"{sub_name_prefix}_{_metric_safe(name)}"] = series["total"]
+    if include_http:
+        for label, endpoint in timings["http"].items():
+            pushed[f"http_{_metric_safe(label)}"] = endpoint["mean"]
+
+    for sub_name, value in pushed.items():
+        BuiltIn().run_keyword("RW.Core.Push Metric", value, f"sub_name={sub_name}")
+    return pushed
+
+
+def add_systest_timing_report(artifact_filename: str = "systest_timings.json") -> str:
+    """
+    Add a summary table of phase and HTTP timings to the report, and write the
+    full timings (including histograms) to a JSON artifact.
+
+    :param artifact_filename: JSON file to write, relative to the Robot output dir.
+    :return: The summary table as text.
+    """
+    timings = _timings.snapshot()
+    with open(_state.artifact_path(artifact_filename), "w", encoding="utf-8") as f:
+        f.write(_codec.dumps(timings))
+
+    table = format_systest_timings(timings)
+    BuiltIn().run_keyword("RW.Core.Add Pre To Report", table)
+    return table
+
+
+def format_systest_timings(timings: dict = None) -> str:
+    """Render phase and HTTP timings as a plain-text table."""
+    timings = timings or _timings.snapshot()
+    lines = [f"{'Phase':<28}{'Calls':>7}{'Total(s)':>11}{'Mean(s)':>10}{'Max(s)':>10}"]
+    for name, s in sorted(timings["phases"].items(), key=lambda item: -item[1]["total"]):
+        lines.append(f"{name:<28}{s['count']:>7}{s['total']:>11.3f}{s['mean']:>10.3f}{s['max']:>10.3f}")
+
+    lines.append("")
+    lines.append(
+        f"{'Endpoint':<60}{'Calls':>7}{'Errors':>8}{'Retries':>9}{'Mean(s)':>10}{'Max(s)':>10}{'KiB':>10}"
+    )
+    for label, e in sorted(timings["http"].items(), key=lambda item: -item[1]["total"]):
+        lines.append(
+            f"{label:<60}{e['count']:>7}{e['errors']:>8}{e['retries']:>9}"
+            f"{e['mean']:>10.3f}{e['max']:>10.3f}{e['bytes'] / 1024:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def _metric_safe(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_]+", "_", name).strip("_").lower()
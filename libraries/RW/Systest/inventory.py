@@ -0,0 +1,493 @@
+"""
+SLX inventory keywords: fleet-wide sweeps, incremental snapshots and tag lookups.
+
+Scope: Global
+"""
+
+from __future__ import annotations
+
+import json, hashlib, threading
+from concurrent import futures
+from datetime import datetime, timezone
+from robot.api import logger as robot_logger
+
+from RW import _codec, _http, _lazy, _timings
+from . import _caches, _state
+from .records import SlxRecord, SlxDocumentLoader
+from .systest import _iter_slx_pages
+
+requests = _lazy.LazyModule("requests")
+platform = _lazy.LazyModule("RW.platform")
+
+DEFAULT_SCOPE_SLX_TAGS = [{"name": "systest", "value": "scope"}]
+DEFAULT_VALIDATION_SLX_TAGS = [{"name": "systest", "value": "validate"}]
+
+
+def _normalize_tag_pairs(tag_list) -> frozenset:
+    """
+    Accept tags either as dicts ({'name': 'systest', 'value': 'scope'}) or as
+    'name:value' strings (as configured in the codebundles) and return a
+    frozenset of (name, value) tuples for constant-time membership checks.
+    """
+    pairs = set()
+    for tag in tag_list or []:
+        if isinstance(tag, dict):
+            pairs.add((tag.get("name"), tag.get("value")))
+        else:
+            name, _, value = str(tag).partition(":")
+            pairs.add((name, value))
+    return frozenset(pairs)
+
+
+def _slx_group_map(
+    rw_api_url: str,
+    api_token: platform.Secret,
+    rw_workspace: str
+) -> dict:
+    """Map each SLX short name to its slxGroup name from workspace.yaml."""
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_token.value}"
+    }
+    url = f"{rw_api_url}/workspaces/{rw_workspace}/branches/main/workspace.yaml?format=json"
+
+    response = _http.request("GET", url, headers=headers, timeout=10)
+    response.raise_for_status()
+    workspace_config = _codec.response_json(response).get("asJson", {}) or {}
+
+    group_map = {}
+    for group in workspace_config.get("spec", {}).get("slxGroups", []):
+        for slx_name in group.get("slxs", []):
+            group_map[slx_name] = group.get("name")
+    return group_map
+
+
+def _sweep_one_workspace(
+    rw_api_url: str,
+    api_token: platform.Secret,
+    rw_workspace: str,
+    scope_pairs: frozenset,
+    validation_pairs: frozenset,
+    include_groups: bool
+) -> dict:
+    """
+    Stream the SLX pages of a single workspace and reduce every SLX to its
+    shortName, tags and group. Full SLX documents are dropped page by page.
+    """
+    group_map = _slx_group_map(rw_api_url, api_token, rw_workspace) if include_groups else {}
+
+    slxs = []
+    scope_count = 0
+    validation_count = 0
+    for payload in _iter_slx_pages(rw_api_url, api_token, rw_workspace):
+        for slx in payload.get("results", []):
+            short_name = slx.get("shortName")
+            tags = [
+                (tag.get("name"), tag.get("value"))
+                for tag in slx.get("spec", {}).get("tags", []) or []
+            ]
+            if any(tag in scope_pairs for tag in tags):
+                scope_count += 1
+            if any(tag in validation_pairs for tag in tags):
+                validation_count += 1
+            slxs.append({
+                "shortName": short_name,
+                "tags": tags,
+                "group": group_map.get(short_name),
+            })
+
+    return {
+        "workspace": rw_workspace,
+        "slxCount": len(slxs),
+        "scopeCount": scope_count,
+        "validationCount": validation_count,
+        "slxs": slxs,
+    }
+
+
+@_timings.phase("inventory_sweep")
+def sweep_workspace_slx_inventory(
+    workspaces: list,
+    rw_api_url: str = "https://papi.beta.runwhen.com/api/v3",
+    api_token: platform.Secret = None,
+    scope_slx_tags: list = None,
+    validation_slx_tags: list = None,
+    max_workers: int = 8,
+    include_groups: bool = True,
+    artifact_filename: str = "slx_inventory_sweep.jsonl"
+) -> dict:
+    """
+    Fetch the SLX inventory of many workspaces on a bounded worker pool and
+    write a compact audit artifact (one JSON line per workspace, followed by
+    a final summary line). Only shortName, tags and group are kept for each
+    SLX, and each workspace is written out as soon as it completes, so memory
+    stays flat as the number of workspaces grows.
+
+    :param workspaces: A list of workspace short names to sweep.
+    :param rw_api_url: Base URL to the RunWhen API.
+    :param api_token: A platform.Secret token containing your bearer token.
+    :param scope_slx_tags: Tags marking scope SLXs, as dicts or 'name:value' strings
+                           (default: systest:scope).
+    :param validation_slx_tags: Tags marking validation SLXs, as dicts or 'name:value'
+                                strings (default: systest:validate).
+    :param max_workers: Maximum number of workspaces fetched concurrently.
+    :param include_groups: Also fetch workspace.yaml to resolve the slxGroup of each SLX.
+    :param artifact_filename: JSON lines file to write, relative to the Robot output dir.
+    :return: A dict of aggregate statistics:
+             {
+               "workspaceCount": <n>,
+               "slxCount": <total>,
+               "perWorkspace": {"<ws>": {"slxCount": n, "scopeCount": n, "validationCount": n}},
+               "missingSystestTags": ["<ws>", ...],
+               "errors": {"<ws>": "<message>"},
+               "artifact": "<path>"
+             }
+    """
+    scope_pairs = _normalize_tag_pairs(scope_slx_tags or DEFAULT_SCOPE_SLX_TAGS)
+    validation_pairs = _normalize_tag_pairs(validation_slx_tags or DEFAULT_VALIDATION_SLX_TAGS)
+    max_workers = max(1, int(max_workers))
+    artifact = _state.artifact_path(artifact_filename)
+
+    summary = {
+        "workspaceCount": 0,
+        "slxCount": 0,
+        "perWorkspace": {},
+        "missingSystestTags": [],
+        "errors": {},
+        "artifact": artifact,
+    }
+
+    def _record(out, rw_workspace, future):
+        summary["workspaceCount"] += 1
+        try:
+            result = future.result()
+        except Exception as e:
+            # Any failure (API error, malformed payload, bad token) only costs this workspace.
+            message = str(e)
+            if not isinstance(e, (requests.RequestException, json.JSONDecodeError)):
+                message = f"{type(e).__name__}: {message}"
+            robot_logger.warn(f"Exception while sweeping SLXs in workspace '{rw_workspace}': {message}")
+            summary["errors"][rw_workspace] = message
+            out.write(_codec.dumps({"workspace": rw_workspace, "error": message}) + "\n")
+            return
+
+        summary["slxCount"] += result["slxCount"]
+        summary["perWorkspace"][rw_workspace] = {
+            "slxCount": result["slxCount"],
+            "scopeCount": result["scopeCount"],
+            "validationCount": result["validationCount"],
+        }
+        if not result["scopeCount"] or not result["validationCount"]:
+            summary["missingSystestTags"].append(rw_workspace)
+        out.write(_codec.dumps(result) + "\n")
+
+    # Keep at most 2x max_workers workspaces in flight so that finished
+    # results are written out and released before new ones are started.
+    with open(artifact, "w", encoding="utf-8") as out, \
+            futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {}
+        for rw_workspace in workspaces:
+            if len(pending) >= max_workers * 2:
+                done, _ = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    _record(out, pending.pop(future), future)
+            future = pool.submit(
+                _sweep_one_workspace,
+                rw_api_url, api_token, rw_workspace,
+                scope_pairs, validation_pairs, include_groups,
+            )
+            pending[future] = rw_workspace
+        for future in futures.as_completed(list(pending)):
+            _record(out, pending.pop(future), future)
+
+        summary["missingSystestTags"].sort()
+        out.write(_codec.dumps({"summary": summary}) + "\n")
+
+    robot_logger.info(
+        f"Swept {summary['workspaceCount']} workspaces ({summary['slxCount']} SLXs), "
+        f"{len(summary['missingSystestTags'])} missing systest tags, "
+        f"{len(summary['errors'])} errors. Artifact: {artifact}"
+    )
+    return summary
+
+
+@_timings.phase("inventory")
+def get_workspace_slx_records(
+    rw_api_url: str = "https://papi.beta.runwhen.com/api/v3",
+    api_token: platform.Secret = None,
+    rw_workspace: str = "my-workspace",
+    include_groups: bool = False
+) -> list:
+    """
+    Get all SLXs in a RunWhen workspace as compact SlxRecords (shortName,
+    interned tag pairs and group) instead of full SLX documents. Pages are
+    reduced as they arrive, so the full listing is never held in memory.
+    Other fields (e.g. `spec`) are fetched on demand from the API.
+
+    The records can be passed to `Get SLXs With Tags From Dict` as `slx_data`,
+    and support `${slx["shortName"]}` in Robot.
+
+    :param rw_api_url: Base URL to the RunWhen API.
+    :param api_token: A platform.Secret token containing your bearer token.
+    :param rw_workspace: Short name of the workspace.
+    :param include_groups: Also fetch workspace.yaml to resolve the slxGroup of each SLX.
+    :return: A list of SlxRecords, or an empty list on error.
+    """
+    loader = SlxDocumentLoader(rw_api_url, api_token, rw_workspace)
+    try:
+        group_map = _slx_group_map(rw_api_url, api_token, rw_workspace) if include_groups else {}
+        records = []
+        for payload in _iter_slx_pages(rw_api_url, api_token, rw_workspace):
+            for slx in payload.get("results", []):
+                records.append(SlxRecord.from_slx(
+                    slx, group=group_map.get(slx.get("shortName")), loader=loader
+                ))
+        return records
+    except (requests.ConnectTimeout,
+            requests.ConnectionError,
+            json.JSONDecodeError) as e:
+        robot_logger.warn(f"Exception while fetching SLXs in workspace '{rw_workspace}': {e}")
+        return []
+
+
+# Per-workspace index of (tag name, tag value) -> set of SLX short names,
+# kept up to date from inventory diffs rather than rebuilt on every sync.
+# _TAG_INDEX_SOURCE records the snapshot (path, lastSync) each index matches,
+# so a diff against any other snapshot rebuilds the index instead.
+_TAG_INDEX = {}
+_TAG_INDEX_SOURCE = {}
+_TAG_INDEX_LOCK = threading.Lock()
+
+
+def _slx_content_hash(slx: dict) -> str:
+    """
+    Hash an SLX document for change detection. The `status` block is left out
+    because it changes on every reconcile without the SLX itself changing.
+    Always uses the stdlib encoder so hashes don't depend on the active codec.
+    """
+    body = {key: value for key, value in slx.items() if key != "status"}
+    encoded = json.dumps(body, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()
+
+
+def _snapshot_entry(slx: dict) -> dict:
+    tags = sorted(
+        [tag.get("name"), tag.get("value")]
+        for tag in slx.get("spec", {}).get("tags", []) or []
+    )
+    return {"hash": _slx_content_hash(slx), "tags": tags}
+
+
+def _fetch_snapshot_entries(
+    rw_api_url: str,
+    api_token: platform.Secret,
+    rw_workspace: str,
+    docs: list = None
+) -> dict:
+    """Snapshot entries for the full listing; the SLX documents are appended to `docs` if given."""
+    entries = {}
+    for payload in _iter_slx_pages(rw_api_url, api_token, rw_workspace):
+        for slx in payload.get("results", []):
+            entries[slx.get("shortName")] = _snapshot_entry(slx)
+            if docs is not None:
+                docs.append(slx)
+    return entries
+
+
+def _fetch_modified_entries(
+    rw_api_url: str,
+    api_token: platform.Secret,
+    rw_workspace: str,
+    previous: dict,
+    modified_since_param: str,
+    since: str
+):
+    """
+    Merge SLXs modified since the last sync into the previous entries. Removals
+    can't be seen in a filtered listing, so the unfiltered total is compared
+    against the merged size; on a mismatch None is returned and the caller
+    falls back to a full listing.
+    """
+    entries = {name: {"hash": entry["hash"], "tags": entry["tags"]} for name, entry in previous.items()}
+    params = {modified_since_param: since}
+    for payload in _iter_slx_pages(rw_api_url, api_token, rw_workspace, params=params):
+        for slx in payload.get("results", []):
+            entries[slx.get("shortName")] = _snapshot_entry(slx)
+
+    # Only the first page of the unfiltered listing is needed for its count.
+    first_page = next(_iter_slx_pages(rw_api_url, api_token, rw_workspace), {})
+    if first_page.get("count") != len(entries):
+        return None
+    return entries
+
+
+def _diff_entries(previous: dict, current: dict) -> dict:
+    added = sorted(name for name in current if name not in previous)
+    removed = sorted(name for name in previous if name not in current)
+    changed = sorted(
+        name for name in current
+        if name in previous and current[name]["hash"] != previous[name]["hash"]
+    )
+    tag_changed = [name for name in changed if current[name]["tags"] != previous[name]["tags"]]
+    return {"added": added, "removed": removed, "changed": changed, "tagChanged": tag_changed}
+
+
+def _apply_inventory_diff(
+    rw_workspace: str,
+    diff: dict,
+    previous: dict,
+    current: dict,
+    previous_source: tuple = None,
+    current_source: tuple = None
+) -> dict:
+    """
+    Bring the tag index in line with the diff and invalidate the SLX caches
+    (task-search memo, runbook task cache) for the SLXs that changed.
+
+    The diff is only applied incrementally when the index was built from the
+    `previous` snapshot (`previous_source`). Otherwise, e.g. when the snapshot
+    file was deleted or rotated while the index survived, the index is rebuilt
+    from `current`, and SLXs it held that are gone upstream are invalidated too.
+    """
+    stale = []
+    with _TAG_INDEX_LOCK:
+        index = _TAG_INDEX.get(rw_workspace)
+        if index is None or not previous or _TAG_INDEX_SOURCE.get(rw_workspace) != previous_source:
+            if index:
+                stale = sorted({name for names in index.values() for name in names} - set(current))
+            index = _TAG_INDEX[rw_workspace] = {}
+            touched_old, touched_new = [], list(current)
+        else:
+            touched_old = diff["removed"] + diff["tagChanged"]
+            touched_new = diff["added"] + diff["tagChanged"]
+        for name in touched_old:
+            for tag in previous[name]["tags"]:
+                index.get(tuple(tag), set()).discard(name)
+        for name in touched_new:
+            for tag in current[name]["tags"]:
+                index.setdefault(tuple(tag), set()).add(name)
+        _TAG_INDEX_SOURCE[rw_workspace] = current_source
+
+    return _caches.invalidate(rw_workspace, diff["added"] + diff["removed"] + diff["changed"] + stale)
+
+
+def _sync_slx_snapshot(
+    rw_api_url: str,
+    api_token: platform.Secret,
+    rw_workspace: str,
+    snapshot_filename: str = None,
+    modified_since_param: str = None,
+    with_docs: bool = False
+):
+    """
+    Update the local inventory snapshot of a workspace and return a tuple of
+    (combined SLX payload, diff against the previous snapshot). The snapshot
+    only keeps each SLX's hash and tags, so `with_docs` (the combined payload)
+    always takes a full listing; without it the payload is None.
+    """
+    path = _state.state_path(snapshot_filename or f"slx_inventory_{rw_workspace}.json")
+    snapshot = _state.read_json(path, default={}) or {}
+    if snapshot.get("workspace") != rw_workspace:
+        snapshot = {}
+    previous = snapshot.get("slxs", {})
+    sync_started = datetime.now(timezone.utc).isoformat()
+
+    entries = None
+    mode = "full"
+    docs = [] if with_docs else None
+    if modified_since_param and snapshot.get("lastSync") and previous and not with_docs:
+        entries = _fetch_modified_entries(
+            rw_api_url, api_token, rw_workspace,
+            previous, modified_since_param, snapshot["lastSync"],
+        )
+        if entries is not None:
+            mode = "modified-since"
+    if entries is None:
+        entries = _fetch_snapshot_entries(rw_api_url, api_token, rw_workspace, docs=docs)
+
+    diff = _diff_entries(previous, entries)
+    diff["mode"] = mode
+    diff["invalidated"] = _apply_inventory_diff(
+        rw_workspace, diff, previous, entries,
+        previous_source=(path, snapshot.get("lastSync")), current_source=(path, sync_started),
+    )
+
+    _state.write_json(path, {
+        "workspace": rw_workspace,
+        "lastSync": sync_started,
+        "slxs": entries,
+    })
+
+    if not with_docs:
+        return None, diff
+    combined = {
+        "count":    len(docs),
+        "next":     None,
+        "previous": None,
+        "results":  docs,
+    }
+    return combined, diff
+
+
+@_timings.phase("inventory")
+def sync_workspace_slx_inventory(
+    rw_api_url: str = "https://papi.beta.runwhen.com/api/v3",
+    api_token: platform.Secret = None,
+    rw_workspace: str = "my-workspace",
+    snapshot_filename: str = None,
+    modified_since_param: str = None
+) -> dict:
+    """
+    Update the local SLX inventory snapshot of a workspace and report what
+    changed since the previous run. Changes are detected from a content hash
+    per SLX; if `modified_since_param` is given (the query parameter the API
+    uses for server-side modified-since filtering), only SLXs modified since
+    the last sync are downloaded.
+
+    The snapshot lives in RW_SYSTEST_STATE_DIR (default /tmp/runwhen/systest).
+    Downstream caches are invalidated from the diff rather than cleared.
+
+    :param rw_api_url: Base URL to the RunWhen API.
+    :param api_token: A platform.Secret token containing your bearer token.
+    :param rw_workspace: Short name of the workspace.
+    :param snapshot_filename: Snapshot file name (default: slx_inventory_<workspace>.json).
+    :param modified_since_param: Query parameter for server-side modified-since filtering (optional).
+    :return: A dict of the form:
+             {
+               "mode": "full" | "modified-since",
+               "added": [...], "removed": [...], "changed": [...], "tagChanged": [...],
+               "invalidated": {"<cache name>": <entries dropped>}
+             }
+    """
+    _, diff = _sync_slx_snapshot(
+        rw_api_url, api_token, rw_workspace,
+        snapshot_filename=snapshot_filename,
+        modified_since_param=modified_since_param,
+    )
+    robot_logger.info(
+        f"SLX inventory diff for '{rw_workspace}' ({diff['mode']}): "
+        f"{len(diff['added'])} added, {len(diff['removed'])} removed, "
+        f"{len(diff['changed'])} changed ({len(diff['tagChanged'])} tag changes)"
+    )
+    return diff
+
+
+def get_slx_names_with_tags(
+    rw_workspace: str,
+    tag_list: list
+) -> list:
+    """
+    Return the short names of SLXs in `rw_workspace` that carry at least one
+    of the given tags, served from the tag index maintained by inventory syncs.
+    Returns an empty list if the workspace hasn't been synced in this process.
+
+    :param rw_workspace: Short name of the workspace.
+    :param tag_list: Tags as dicts ({'name': ..., 'value': ...}) or 'name:value' strings.
+    :return: A sorted list of SLX short names.
+    """
+    with _TAG_INDEX_LOCK:
+        index = _TAG_INDEX.get(rw_workspace, {})
+        matches = set()
+        for tag in _normalize_tag_pairs(tag_list):
+            matches |= index.get(tag, set())
+    return sorted(matches)
@@ -0,0 +1,336 @@
+"""
+RunSession load test: drive task search -> RunSession -> poll cycles at a
+target arrival rate or concurrency and measure how the platform keeps up.
+
+Scope: Global
+"""
+
+from __future__ import annotations
+
+import itertools, math, threading, time
+from collections import Counter
+from concurrent import futures
+from typing import Union
+from robot.api import logger as robot_logger
+
+from RW import _codec, _lazy
+from . import _state
+from .systest import _poll_runsession, close_runsession, create_runsession_from_task_search, perform_task_search
+
+requests = _lazy.LazyModule("requests")
+platform = _lazy.LazyModule("RW.platform")
+
+PERCENTILES = (("p50", 0.5), ("p90", 0.9), ("p95", 0.95), ("p99", 0.99))
+LATENCY_FIELDS = (
+    ("search", "searchSeconds"),
+    ("create", "createSeconds"),
+    ("firstRunRequest", "firstRunRequestSeconds"),
+    ("endToEnd", "endToEndSeconds"),
+    ("scheduleLag", "lagSeconds"),
+)
+
+
+class _NoTasksError(Exception):
+    """The task search returned nothing above the threshold, so no RunSession was created."""
+
+
+def _latency_summary(values: list) -> dict:
+    """Nearest-rank percentiles, mean and max, in seconds."""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    summary = {"count": len(ordered)}
+    for name, q in PERCENTILES:
+        summary[name] = round(ordered[max(0, math.ceil(q * len(ordered)) - 1)], 4)
+    summary["mean"] = round(sum(ordered) / len(ordered), 4)
+    summary["max"] = round(ordered[-1], 4)
+    return summary
+
+
+def _error_type(error: Exception) -> str:
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return f"HTTP {error.response.status_code}"
+    if isinstance(error, _NoTasksError):
+        return "NoTasks"
+    return type(error).__name__
+
+
+def _run_session(params: dict, index: int, scheduled: float, origin: float) -> dict:
+    """
+    One search -> create -> poll cycle. Latencies are measured from the
+    scheduled arrival time, so a saturated client doesn't hide queueing
+    (coordinated omission); `lagSeconds` is how late the cycle started.
+    Any error fails the cycle rather than the load test, and a RunSession
+    that was created is always closed so it stops taking runners.
+    """
+    started = time.perf_counter()
+    record = {
+        "index": index,
+        "scheduledAt": round(scheduled - origin, 4),
+        "lagSeconds": round(max(0.0, started - scheduled), 4),
+        "runsessionId": None,
+        "runRequests": None,
+        "searchSeconds": None,
+        "createSeconds": None,
+        "firstRunRequestSeconds": None,
+        "endToEndSeconds": None,
+        "error": None,
+        "closeError": None,
+    }
+    phase = "search"
+    try:
+        search_response = perform_task_search(
+            rw_api_url=params["rw_api_url"],
+            api_token=params["api_token"],
+            rw_workspace=params["rw_workspace"],
+            persona=f"{params['rw_workspace']}--{params['persona_shortname']}",
+            query=params["query"],
+            slx_scope=params["slx_scope"],
+        )
+        searched = time.perf_counter()
+        record["searchSeconds"] = round(searched - started, 4)
+
+        phase = "create"
+        runsession = create_runsession_from_task_search(
+            search_response,
+            params["api_token"],
+            rw_api_url=params["rw_api_url"],
+            rw_workspace=params["rw_workspace"],
+            persona_shortname=params["persona_shortname"],
+            query=params["query"],
+            score_threshold=params["score_threshold"],
+            max_tasks_per_slx=params["max_tasks_per_slx"],
+            max_tasks=params["max_tasks"],
+        )
+        created = time.perf_counter()
+        record["createSeconds"] = round(created - searched, 4)
+        if not runsession.get("id"):
+            raise _NoTasksError(f"No tasks above {params['score_threshold']} for '{params['query']}'.")
+        record["runsessionId"] = runsession["id"]
+
+        def _on_poll(session_data):
+            if record["firstRunRequestSeconds"] is None and session_data.get("runRequests"):
+                record["firstRunRequestSeconds"] = round(time.perf_counter() - scheduled, 4)
+
+        phase = "poll"
+        final = _poll_runsession(
+            params["rw_workspace"], runsession["id"], params["rw_api_url"], params["api_token"],
+            poll_interval=params["poll_interval"], max_wait_seconds=params["max_wait_seconds"],
+            on_poll=_on_poll,
+        )
+        record["runRequests"] = len(final.get("runRequests", []))
+        record["endToEndSeconds"] = round(time.perf_counter() - scheduled, 4)
+    except Exception as e:
+        record["error"] = {"phase": phase, "type": _error_type(e), "message": str(e)[:500]}
+    finally:
+        if record["runsessionId"]:
+            try:
+                close_runsession(
+                    params["rw_workspace"], record["runsessionId"], params["rw_api_url"], params["api_token"]
+                )
+            except Exception as e:
+                record["closeError"] = f"{_error_type(e)}: {str(e)[:200]}"
+    return record
+
+
+def _run_open_loop(params, arrival_rate, deadline, max_in_flight, max_sessions, origin):
+    """Start cycles on a fixed schedule; arrivals that find the pool full are skipped."""
+    interval = 1.0 / arrival_rate
+    submitted, skipped = [], 0
+    in_flight = set()
+    with futures.ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        for index in itertools.count():
+            scheduled = origin + index * interval
+            if scheduled >= deadline or (max_sessions and index >= max_sessions):
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            in_flight = {future for future in in_flight if not future.done()}
+            if len(in_flight) >= max_in_flight:
+                skipped += 1
+                continue
+            future = pool.submit(_run_session, params, index, scheduled, origin)
+            in_flight.add(future)
+            submitted.append(future)
+    return [future.result() for future in submitted], skipped
+
+
+def _run_closed_loop(params, concurrency, deadline, max_sessions, origin):
+    """Keep `concurrency` cycles running back to back until the deadline."""
+    counter = itertools.count()
+    counter_lock = threading.Lock()
+    records = []
+
+    def _worker():
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                return
+            with counter_lock:
+                index = next(counter)
+            if max_sessions and index >= max_sessions:
+                return
+            records.append(_run_session(params, index, now, origin))
+
+    with futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(_worker) for _ in range(concurrency)]:
+            future.result()
+    records.sort(key=lambda record: record["index"])
+    return records, 0
+
+
+def _summarize_load_test(records: list, skipped: int, elapsed: float) -> dict:
+    failed = [record for record in records if record["error"]]
+    completed = len(records) - len(failed)
+    return {
+        "arrivals": len(records) + skipped,
+        "started": len(records),
+        "completed": completed,
+        "failed": len(failed),
+        "skipped": skipped,
+        "closeErrors": sum(1 for record in records if record["closeError"]),
+        "errorRate": round(len(failed) / len(records), 4) if records else 0.0,
+        "errorsByPhase": dict(Counter(record["error"]["phase"] for record in failed)),
+        "errorsByType": dict(Counter(record["error"]["type"] for record in failed)),
+        "elapsedSeconds": round(elapsed, 3),
+        "throughputPerMinute": round(completed / elapsed * 60, 2) if elapsed else 0.0,
+        "latency": {
+            name: _latency_summary([record[field] for record in records if record[field] is not None])
+            for name, field in LATENCY_FIELDS
+        },
+    }
+
+
+def run_runsession_load_test(
+    rw_api_url: str,
+    api_token: platform.Secret,
+    rw_workspace: str,
+    query: str,
+    persona_shortname: str = "eager-edgar",
+    slx_scope: list = None,
+    duration_seconds: float = 60.0,
+    concurrency: int = None,
+    arrival_rate: float = None,
+    max_in_flight: int = 32,
+    max_sessions: int = None,
+    score_threshold: float = 0.3,
+    max_tasks_per_slx: int = None,
+    max_tasks: int = None,
+    poll_interval: float = 5.0,
+    max_wait_seconds: float = 300.0,
+    artifact_filename: str = "runsession_load_test.json"
+) -> dict:
+    """
+    Repeatedly run `Perform Task Search`, `Create RunSession from Task Search`
+    and the RunSession poller for `duration_seconds`, and report latency
+    percentiles, error rates and throughput.
+
+    Two load models are supported:
+      - closed loop (`concurrency`): that many cycles run back to back, so the
+        load adapts to how fast the platform answers;
+      - open loop (`arrival_rate`, cycles per second): cycles start on a fixed
+        schedule regardless of response times, up to `max_in_flight` at once.
+        Arrivals that find the limit reached are counted as `skipped`.
+    Latencies are measured from the scheduled start, so queueing delay shows up
+    in the percentiles. Cycles still running at the end of the duration are
+    waited for. Every cycle creates a real RunSession, which is closed when the
+    cycle ends, so point this at a test workspace (or at benchmarks/fake_papi.py in CI).
+
+    :param rw_api_url: Base URL to the RunWhen API.
+    :param api_token: A platform.Secret token containing your bearer token.
+    :param rw_workspace: Short name of the workspace.
+    :param query: The task search query.
+    :param persona_shortname: Persona shortname (without the workspace prefix).
+    :param slx_scope: slxShortNames to limit the search scope (optional).
+    :param duration_seconds: How long to keep starting new cycles.
+    :param concurrency: Closed-loop worker count. Default 1 if no arrival_rate is given.
+    :param arrival_rate: Open-loop arrivals per second; takes precedence over concurrency.
+    :param max_in_flight: Open-loop limit on concurrently running cycles.
+    :param max_sessions: Stop after starting this many cycles (None or 0: no limit).
+    :param score_threshold: Minimum task score, as for `Create RunSession from Task Search`.
+    :param max_tasks_per_slx: Top-k tasks kept per SLX (None or 0: no limit).
+    :param max_tasks: Task budget per RunSession (None or 0: no limit).
+    :param poll_interval: Seconds between RunSession polls.
+    :param max_wait_seconds: Poll timeout per RunSession; a timeout counts as a poll error.
+    :param artifact_filename: JSON file with the summary and every cycle, relative to the Robot output dir.
+    :return: A dict of the form:
+             {
+               "mode": "open" | "closed", "target": {...},
+               "arrivals", "started", "completed", "failed", "skipped", "closeErrors", "errorRate",
+               "errorsByPhase": {"search" | "create" | "poll": n}, "errorsByType": {"HTTP 503": n, ...},
+               "elapsedSeconds", "throughputPerMinute",
+               "latency": {"search" | "create" | "firstRunRequest" | "endToEnd" | "scheduleLag":
+                           {"count", "p50", "p90", "p95", "p99", "mean", "max"}},
+               "artifact": "<path>"
+             }
+    """
+    params = {
+        "rw_api_url": rw_api_url,
+        "api_token": api_token,
+        "rw_workspace": rw_workspace,
+        "query": query,
+        "persona_shortname": persona_shortname,
+        "slx_scope": list(slx_scope or []),
+        "score_threshold": score_threshold,
+        "max_tasks_per_slx": max_tasks_per_slx,
+        "max_tasks": max_tasks,
+        "poll_interval": poll_interval,
+        "max_wait_seconds": max_wait_seconds,
+    }
+
+    origin = time.perf_counter()
+    deadline = origin + float(duration_seconds)
+    if arrival_rate:
+        target = {"arrivalRate": arrival_rate, "maxInFlight": max_in_flight, "durationSeconds": duration_seconds}
+        robot_logger.info(f"Starting open-loop RunSession load test: {target}")
+        records, skipped = _run_open_loop(
+            params, float(arrival_rate), deadline, max(1, int(max_in_flight)), max_sessions, origin
+        )
+    else:
+        target = {"concurrency": int(concurrency or 1), "durationSeconds": duration_seconds}
+        robot_logger.info(f"Starting closed-loop RunSession load test: {target}")
+        records, skipped = _run_closed_loop(params, target["concurrency"], deadline, max_sessions, origin)
+    elapsed = time.perf_counter() - origin
+
+    summary = {"mode": "open" if arrival_rate else "closed", "target": target}
+    summary.update(_summarize_load_test(records, skipped, elapsed))
+    summary["artifact"] = _state.artifact_path(artifact_filename)
+    with open(summary["artifact"], "w", encoding="utf-8") as f:
+        f.write(_codec.dumps({"summary": summary, "sessions": records}))
+
+    end_to_end = summary["latency"]["endToEnd"]
+    robot_logger.info(
+        f"RunSession load test: {summary['completed']}/{summary['started']} cycles completed "
+        f"({summary['skipped']} skipped, error rate {summary['errorRate']:.1%}), "
+        f"{summary['throughputPerMinute']}/min, end-to-end p95 {end_to_end.get('p95')}s. "
+        f"Artifact: {summary['artifact']}"
+    )
+    return summary
+
+
+def format_load_test_summary(summary: Union[str, dict]) -> str:
+    """
+    Render the result of `Run RunSession Load Test` as a plain-text table for
+    `Add Pre To Report`.
+    """
+    summary = _codec.as_object(summary)
+    target = ", ".join(f"{k}={v}" for k, v in summary.get("target", {}).items())
+    lines = [
+        f"Mode: {summary.get('mode')} ({target})",
+        f"Cycles: {summary.get('started')} started, {summary.get('completed')} completed, "
+        f"{summary.get('failed')} failed, {summary.get('skipped')} skipped "
+        f"(error rate {summary.get('errorRate', 0):.1%})",
+        f"Throughput: {summary.get('throughputPerMinute')} RunSessions/min over {summary.get('elapsedSeconds')}s",
+    ]
+    if summary.get("errorsByType"):
+        lines.append(f"Errors: {summary['errorsByPhase']} {summary['errorsByType']}")
+    if summary.get("closeErrors"):
+        lines.append(f"RunSessions left open (close failed): {summary['closeErrors']}")
+    lines.append("")
+    lines.append(f"{'Latency (s)':<18}{'count':>7}{'p50':>10}{'p90':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for name, _ in LATENCY_FIELDS:
+        stats = summary.get("latency", {}).get(name, {})
+        cells = "".join(f"{'-' if stats.get(key) is None else stats[key]:>10}" for key in ("p50", "p90", "p95", "p99", "max"))
+        lines.append(f"{name:<18}{stats.get('count', 0):>7}{cells}")
+    return "\n".join(lines)
@@ -0,0 +1,259 @@
+"""
+Compare how engineering assistants (personas) rank the tasks for one query.
+
+Scope: Global
+"""
+
+from __future__ import annotations
+
+import itertools, math, time
+from concurrent import futures
+from typing import Union
+from robot.api import logger as robot_logger
+
+from RW import _codec, _http, _lazy, _timings
+from .systest import _extract_task_candidates, _normalize_task_title, plan_runsession_from_task_search
+
+platform = _lazy.LazyModule("RW.platform")
+
+QUANTILES = (("min", 0.0), ("p25", 0.25), ("median", 0.5), ("p75", 0.75), ("max", 1.0))
+
+
+def _parse_personas(personas, rw_workspace: str) -> list:
+    """Persona shortnames from a list or a comma separated string, without the workspace prefix."""
+    if isinstance(personas, str):
+        personas = personas.split(",")
+    names = []
+    for persona in personas or []:
+        name = str(persona).strip()
+        if name.startswith(f"{rw_workspace}--"):
+            name = name[len(rw_workspace) + 2:]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def _score_distribution(scores: list) -> dict:
+    """Nearest-rank quantiles and mean of the task scores."""
+    if not scores:
+        return {"count": 0}
+    ordered = sorted(scores)
+    distribution = {"count": len(ordered)}
+    for name, q in QUANTILES:
+        distribution[name] = round(ordered[max(0, math.ceil(q * len(ordered)) - 1)], 4)
+    distribution["mean"] = round(sum(ordered) / len(ordered), 4)
+    return distribution
+
+
+def _ranking(candidates: list) -> list:
+    """(slxName, normalised title) keys in descending score order, first occurrence only."""
+    ranked, seen = [], set()
+    for _, slx_name, title in sorted(candidates, key=lambda candidate: candidate[0], reverse=True):
+        key = (slx_name, _normalize_task_title(title))
+        if key not in seen:
+            seen.add(key)
+            ranked.append(key)
+    return ranked
+
+
+def _rank_biased_overlap(a: list, b: list, depth: int, p: float) -> float:
+    """
+    Rank-biased overlap of two rankings truncated at `depth` (0 to 1): agreement
+    at each depth, weighted towards the top ranks by `p`.
+    """
+    depth = min(depth, max(len(a), len(b)))
+    if depth < 1:
+        return 1.0
+    seen_a, seen_b, shared, total = set(), set(), 0, 0.0
+    for d in range(depth):
+        if d < len(a):
+            shared += a[d] in seen_b
+            seen_a.add(a[d])
+        if d < len(b):
+            shared += b[d] in seen_a
+            seen_b.add(b[d])
+        total += p ** d * shared / (d + 1)
+    # Normalise by the weight of a perfect match, so identical rankings score 1.
+    return round(total / sum(p ** d for d in range(depth)), 4)
+
+
+def _search_persona(url: str, headers: dict, shared: dict, persona: str) -> tuple:
+    """POST the shared payload for one persona; returns (response JSON, seconds)."""
+    started = time.perf_counter()
+    response = _http.request("POST", url, json={**shared, "persona": persona}, headers=headers, timeout=60)
+    response.raise_for_status()
+    return _codec.response_json(response), round(time.perf_counter() - started, 4)
+
+
+@_timings.phase("persona_comparison")
+def compare_personas_for_task_search(
+    rw_api_url: str,
+    api_token: platform.Secret,
+    rw_workspace: str,
+    query: str,
+    personas: Union[str, list],
+    slx_scope: list = None,
+    score_threshold: float = 0.3,
+    max_tasks_per_slx: int = None,
+    max_tasks: int = None,
+    top_n: int = 10,
+    rbo_p: float = 0.9,
+    max_workers: int = 8
+) -> dict:
+    """
+    Run one task search per persona, concurrently, and compare the results.
+    No RunSessions are created.
+
+    The request body (query and scope) is built once and only the persona
+    differs per request. A persona whose search fails or returns a response
+    that can't be read gets an `error` and is left out of the comparison.
+    For each persona, the tasks that would make the
+    RunSession are selected as in `Plan RunSession from Task Search`. Each
+    pair of personas is compared on its top `top_n` tasks (by SLX and
+    normalised title):
+      - jaccard: tasks in both top lists / tasks in either.
+      - rbo: rank-biased overlap, which weighs agreement near the top more
+        (`rbo_p` closer to 1 looks deeper). 1 means the same order.
+
+    :param rw_api_url: Base URL to the RunWhen API.
+    :param api_token: A platform.Secret token containing your bearer token.
+    :param rw_workspace: Short name of the workspace.
+    :param query: The search query.
+    :param personas: Persona shortnames, as a list or comma separated (the workspace prefix is optional).
+    :param slx_scope: A list of slxShortNames to limit the search scope (optional).
+    :param score_threshold: Minimum task score for a task to make the RunSession.
+    :param max_tasks_per_slx: Top-k tasks kept per SLX (None or 0: no limit).
+    :param max_tasks: Task budget per RunSession (None or 0: no limit).
+    :param top_n: Depth of the rank comparison.
+    :param rbo_p: Persistence of the rank-biased overlap, between 0 and 1.
+    :param max_workers: Searches run concurrently.
+    :return: A dict of the form:
+             {
+               "query": "<query>", "scope": [...], "scoreThreshold": <t>,
+               "personas": {"<persona>": {"taskCount", "selectedCount", "scores": {"count", "min", "p25",
+                            "median", "p75", "max", "mean"}, "selected": [{"slxName", "title", "score"}],
+                            "top": [{"slxName", "title"}], "seconds", "error"}},
+               "overlap": [{"a", "b", "jaccard", "rbo"}],
+               "consensus": [{"slxName", "title"}],
+               "seconds": <wall time>
+             }
+    """
+    names = _parse_personas(personas, rw_workspace)
+    if not names:
+        raise ValueError("At least one persona is needed for a comparison.")
+    slx_scope = list(slx_scope or [])
+    top_n = max(1, int(top_n))
+    url = f"{rw_api_url}/workspaces/{rw_workspace}/task-search"
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_token.value}"
+    }
+    shared = {"query": [query], "scope": slx_scope}
+
+    started = time.perf_counter()
+    results, rankings = {}, {}
+    with futures.ThreadPoolExecutor(max_workers=max(1, min(int(max_workers), len(names)))) as pool:
+        pending = {
+            pool.submit(_search_persona, url, headers, shared, f"{rw_workspace}--{name}"): name
+            for name in names
+        }
+        for future in futures.as_completed(pending):
+            name = pending[future]
+            try:
+                response, seconds = future.result()
+                candidates = _extract_task_candidates(response.get("tasks", []), rw_workspace)
+                plan = plan_runsession_from_task_search(
+                    response, rw_workspace=rw_workspace, persona_shortname=name, query=query,
+                    score_threshold=score_threshold, max_tasks_per_slx=max_tasks_per_slx, max_tasks=max_tasks,
+                )
+                ranking = _ranking(candidates)[:top_n]
+                scores = _score_distribution([candidate[0] for candidate in candidates])
+            except Exception as e:
+                # A failed search or a malformed response only costs this persona its place in the comparison.
+                results[name] = {"taskCount": 0, "selectedCount": 0, "scores": {"count": 0}, "selected": [],
+                                 "top": [], "seconds": None, "error": f"{type(e).__name__}: {e}"}
+                continue
+            rankings[name] = ranking
+            results[name] = {
+                "taskCount": len(candidates),
+                "selectedCount": plan["taskCount"],
+                "scores": scores,
+                "selected": plan["selected"],
+                "top": [{"slxName": slx_name, "title": title} for slx_name, title in ranking],
+                "seconds": seconds,
+                "error": None,
+            }
+
+    answered = [name for name in names if name in rankings]
+    overlap = []
+    for a, b in itertools.combinations(answered, 2):
+        top_a, top_b = set(rankings[a]), set(rankings[b])
+        union = top_a | top_b
+        overlap.append({
+            "a": a,
+            "b": b,
+            "jaccard": round(len(top_a & top_b) / len(union), 4) if union else 1.0,
+            "rbo": _rank_biased_overlap(rankings[a], rankings[b], top_n, float(rbo_p)),
+        })
+
+    # Tasks that every persona that answered would put in the RunSession, in the first one's order.
+    consensus = []
+    if answered:
+        shared = set.intersection(*(
+            {(task["slxName"], _normalize_task_title(task["title"])) for task in results[name]["selected"]}
+            for name in answered
+        ))
+        consensus = [
+            {"slxName": task["slxName"], "title": task["title"]}
+            for task in results[answered[0]]["selected"]
+            if (task["slxName"], _normalize_task_title(task["title"])) in shared
+        ]
+
+    comparison = {
+        "query": query,
+        "scope": slx_scope,
+        "scoreThreshold": score_threshold,
+        "personas": {name: results[name] for name in names},
+        "overlap": overlap,
+        "consensus": consensus,
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+    errors = sum(1 for name in names if results[name]["error"])
+    robot_logger.info(
+        f"Compared {len(names)} personas for '{query}' in {comparison['seconds']}s: "
+        f"{len(consensus)} tasks selected by every persona, {errors} failed searches"
+    )
+    return comparison
+
+
+def format_persona_comparison(comparison: Union[str, dict]) -> str:
+    """
+    Render the result of `Compare Personas For Task Search` as a plain-text
+    table for `Add Pre To Report`.
+    """
+    comparison = _codec.as_object(comparison)
+    personas = comparison.get("personas", {})
+    width = max([len("Persona")] + [len(name) for name in personas]) + 2
+    lines = [
+        f"Query: {comparison.get('query')} (threshold {comparison.get('scoreThreshold')}, "
+        f"{len(comparison.get('scope') or [])} scoped SLXs)",
+        "",
+        f"{'Persona':<{width}}{'tasks':>7}{'selected':>10}{'min':>8}{'median':>8}{'max':>8}{'mean':>8}{'secs':>8}",
+    ]
+    for name, result in personas.items():
+        if result.get("error"):
+            lines.append(f"{name:<{width}}{result['error']}")
+            continue
+        scores = result.get("scores", {})
+        cells = "".join(f"{'-' if scores.get(key) is None else scores[key]:>8}" for key in ("min", "median", "max", "mean"))
+        lines.append(f"{name:<{width}}{result['taskCount']:>7}{result['selectedCount']:>10}{cells}{result['seconds']:>8}")
+    if comparison.get("overlap"):
+        lines.append("")
+        lines.append(f"{'Pair':<{width * 2 + 3}}{'jaccard':>9}{'rbo':>8}")
+        for pair in comparison["overlap"]:
+            lines.append(f"{pair['a'] + ' / ' + pair['b']:<{width * 2 + 3}}{pair['jaccard']:>9}{pair['rbo']:>8}")
+    lines.append("")
+    lines.append(f"Selected by every persona: {len(comparison.get('consensus', []))} tasks")
+    for task in comparison.get("consensus", []):
+        lines.append(f"  {task['slxName']}: {task['title']}")
+    return "\n".join(lines)
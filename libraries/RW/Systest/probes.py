@@ -0,0 +1,345 @@
+"""
+Concurrent SLI probes with a weighted health score.
+
+The systest SLI checks several things that don't depend on each other: index
+health, the SLX inventory and its systest tags, task search reachability and
+the end-to-end RunSession validation. Running them on a thread pool makes the
+critical path the slowest probe (normally the RunSession wait) instead of the
+sum of all of them. Robot keywords (e.g. `RW.Core.Push Metric`) may only run on
+the main thread, and Robot drops log messages from other threads, so partial
+metrics are pushed and each probe's log lines are written from there as
+probes finish.
+
+Scope: Global
+"""
+
+from __future__ import annotations
+
+import json, time
+from concurrent import futures
+from typing import Union
+from robot.api import logger as robot_logger
+from robot.libraries.BuiltIn import BuiltIn
+
+from RW import _lazy
+from . import _alerts
+from .checkpoint import _wait_with_checkpoint, get_runsession_checkpoint, save_runsession_checkpoint
+from .inventory import DEFAULT_SCOPE_SLX_TAGS, DEFAULT_VALIDATION_SLX_TAGS, _normalize_tag_pairs, get_workspace_slx_records
+from .systest import (
+    create_runsession_from_task_search, get_nearby_slxs, get_visited_slx_and_tasks_from_runsession,
+    get_workspace_config, get_workspace_index_status, perform_task_search,
+)
+
+platform = _lazy.LazyModule("RW.platform")
+
+PROBES = ("index", "inventory", "search", "runsession")
+# The SLI score has always been the mean of index health and RunSession validation.
+DEFAULT_PROBE_WEIGHTS = {"index": 1.0, "inventory": 0.0, "search": 0.0, "runsession": 1.0}
+HEALTHY_INDEX_STATUSES = ("complete", "green")
+
+
+def _parse_weights(weights) -> dict:
+    """Accept a dict, a JSON object string, or "name:weight" pairs (list or comma separated)."""
+    if not weights:
+        return dict(DEFAULT_PROBE_WEIGHTS)
+    if isinstance(weights, str):
+        text = weights.strip()
+        weights = json.loads(text) if text.startswith("{") else [pair for pair in text.split(",") if pair.strip()]
+    if isinstance(weights, (list, tuple)):
+        weights = dict(str(pair).split(":", 1) for pair in weights)
+    parsed = {}
+    for name, weight in weights.items():
+        name = name.strip()
+        if name not in PROBES:
+            raise ValueError(f"Unknown SLI probe {name!r}; expected one of {PROBES}.")
+        parsed[name] = float(weight)
+    return {name: parsed.get(name, 0.0) for name in PROBES}
+
+
+def _probe_index(ctx: dict, log: list) -> tuple:
+    status, _ = get_workspace_index_status(
+        rw_api_url=ctx["rw_api_url"], api_token=ctx["api_token"], rw_workspace=ctx["rw_workspace"]
+    )
+    log.append(f"Index status of '{ctx['rw_workspace']}': {status}")
+    return (1.0 if status in HEALTHY_INDEX_STATUSES else 0.0), {"status": status}
+
+
+def _inventory(ctx: dict) -> dict:
+    """Scope and validation SLXs from the workspace inventory; shared by two probes."""
+    records = get_workspace_slx_records(ctx["rw_api_url"], ctx["api_token"], ctx["rw_workspace"])
+    scope_pairs, validation_pairs = ctx["scope_pairs"], ctx["validation_pairs"]
+    return {
+        "slxCount": len(records),
+        "scope": [record.shortName for record in records if record.has_any_tag(scope_pairs)],
+        "validation": [record.shortName for record in records if record.has_any_tag(validation_pairs)],
+    }
+
+
+def _probe_inventory(ctx: dict, log: list) -> tuple:
+    inventory = ctx["inventory"].result()
+    log.append(
+        f"{inventory['slxCount']} SLXs, scope: {inventory['scope']}, validation: {inventory['validation']}"
+    )
+    healthy = bool(inventory["slxCount"] and inventory["scope"] and inventory["validation"])
+    return (1.0 if healthy else 0.0), {
+        "slxCount": inventory["slxCount"],
+        "scopeCount": len(inventory["scope"]),
+        "validationCount": len(inventory["validation"]),
+    }
+
+
+def _probe_search(ctx: dict, log: list) -> tuple:
+    # Unscoped, so it doesn't wait for the inventory.
+    response = perform_task_search(
+        rw_api_url=ctx["rw_api_url"], api_token=ctx["api_token"], rw_workspace=ctx["rw_workspace"],
+        persona=f"{ctx['rw_workspace']}--{ctx['persona_shortname']}", query=ctx["query"],
+    )
+    tasks = response.get("tasks", [])
+    log.append(f"Task search for '{ctx['query']}' returned {len(tasks)} tasks")
+    return (1.0 if tasks else 0.0), {"taskCount": len(tasks)}
+
+
+def _probe_runsession(ctx: dict, log: list) -> tuple:
+    """The e2e validation from sli.robot: search, create (or resume), wait, check visited SLXs."""
+    inventory = ctx["inventory"].result()
+    slx_scope, validation_slxs = list(inventory["scope"]), inventory["validation"]
+    rw_workspace, rw_api_url, api_token = ctx["rw_workspace"], ctx["rw_api_url"], ctx["api_token"]
+
+    # A scope of a single SLX tends to present search issues; add its group.
+    if len(slx_scope) == 1:
+        config = get_workspace_config(rw_api_url=rw_api_url, api_token=api_token, rw_workspace=rw_workspace)
+        if config:
+            slx_scope += [slx for slx in get_nearby_slxs(config, slx_scope[0]) if slx not in slx_scope]
+    log.append(f"Scope: {slx_scope}, validation: {validation_slxs}")
+    details = {"scope": slx_scope, "validation": validation_slxs, "runsessionId": None}
+    if not slx_scope or not validation_slxs:
+        details["skipped"] = "No SLXs found for scope or validation."
+        return 0.0, details
+
+    checkpoint = get_runsession_checkpoint(
+        rw_workspace, ctx["query"], rw_api_url, api_token,
+        max_age_seconds=ctx["checkpoint_max_age"], max_resumes=ctx["max_resumes"],
+    )
+    if checkpoint:
+        runsession_id = checkpoint["runsessionId"]
+        details["resumed"] = True
+        log.append(f"Resuming RunSession {runsession_id} (resume {checkpoint.get('resumes')})")
+    else:
+        search_results = perform_task_search(
+            rw_api_url=rw_api_url, api_token=api_token, rw_workspace=rw_workspace,
+            persona=f"{rw_workspace}--{ctx['persona_shortname']}", query=ctx["query"], slx_scope=slx_scope,
+        )
+        if not search_results.get("tasks"):
+            details["skipped"] = "Search returned no results."
+            return 0.0, details
+        runsession = create_runsession_from_task_search(
+            search_results, api_token, rw_api_url=rw_api_url, rw_workspace=rw_workspace,
+            persona_shortname=ctx["persona_shortname"], query=ctx["query"],
+            score_threshold=ctx["score_threshold"],
+            max_tasks_per_slx=ctx["max_tasks_per_slx"], max_tasks=ctx["max_tasks"],
+        )
+        if not runsession.get("id"):
+            details["skipped"] = "No tasks above the score threshold."
+            return 0.0, details
+        runsession_id = runsession["id"]
+        log.append(f"Created RunSession {runsession_id} from {len(search_results['tasks'])} search results")
+        save_runsession_checkpoint(
+            rw_workspace, ctx["query"], runsession_id, phase="created", validation_slxs=validation_slxs,
+        )
+    details["runsessionId"] = runsession_id
+
+    watch = None
+    if ctx["alert_severity"]:
+        # Polled on this worker thread; the main thread raises the alerts (see run_systest_probes).
+        watch = ctx["alert_watch"] = _alerts.SeverityWatch(
+            rw_workspace, runsession_id, rw_api_url, ctx["alert_severity"],
+            action=ctx["alert_action"], stop=ctx["stop_on_alert"],
+        )
+    result = _wait_with_checkpoint(
+        rw_workspace, ctx["query"], runsession_id, rw_api_url, api_token,
+        ctx["poll_interval"], ctx["max_wait_seconds"], validation_slxs, watch,
+    )
+    ctx["runsession_data"] = result["runsession"]
+    visited = get_visited_slx_and_tasks_from_runsession(result["runsession"])
+    overlap = [slx for slx in validation_slxs if slx in visited or f"{rw_workspace}--{slx}" in visited]
+    log.append(
+        f"RunSession {runsession_id} {'completed' if result['complete'] else 'still running'}, "
+        f"visited {len(visited)} SLXs, validation SLXs visited: {overlap}"
+    )
+    details.update({
+        "complete": result["complete"], "stoppedOnAlert": result["stoppedOnAlert"], "visited": overlap,
+        "alerts": len(watch.alerts) if watch else 0,
+    })
+    if result["stoppedOnAlert"] and not overlap:
+        # A partial RunSession hasn't failed validation; leave it out of the score.
+        details["skipped"] = "The wait stopped on a severity alert before a validation SLX was visited."
+        return None, details
+    return (1.0 if overlap else 0.0), details
+
+
+_PROBE_FUNCTIONS = {
+    "index": _probe_index,
+    "inventory": _probe_inventory,
+    "search": _probe_search,
+    "runsession": _probe_runsession,
+}
+
+
+def _timed(func, ctx: dict) -> dict:
+    """Run a probe on a worker thread; any exception scores it 0. Log lines go in details["log"]."""
+    started = time.perf_counter()
+    log = []
+    try:
+        score, details = func(ctx, log)
+        error = None
+    except Exception as e:
+        score, details, error = 0.0, {}, f"{type(e).__name__}: {e}"
+    details["log"] = log
+    return {"score": score, "seconds": round(time.perf_counter() - started, 4), "details": details, "error": error}
+
+
+def run_systest_probes(
+    rw_api_url: str,
+    api_token: platform.Secret,
+    rw_workspace: str,
+    query: str,
+    persona_shortname: str = "eager-edgar",
+    scope_slx_tags: list = None,
+    validation_slx_tags: list = None,
+    weights: Union[str, dict, list] = None,
+    score_threshold: float = 0.3,
+    max_tasks_per_slx: int = None,
+    max_tasks: int = None,
+    poll_interval: float = 5.0,
+    max_wait_seconds: float = 300.0,
+    checkpoint_max_age: float = 3600,
+    max_resumes: int = 3,
+    push_partial_metrics: bool = True,
+    sub_name_prefix: str = "probe",
+    alert_severity: int = None,
+    alert_action: str = "issue",
+    stop_on_alert: bool = False
+) -> dict:
+    """
+    Run the SLI probes concurrently and combine their 0/1 scores into a
+    weighted health score.
+
+    Probes:
+      - index: the workspace index status is complete or green.
+      - inventory: the workspace has SLXs, including scope and validation SLXs.
+      - search: an unscoped task search for `query` returns tasks.
+      - runsession: the e2e RunSession validation, with checkpoint and resume
+        (see `Wait For RunSession With Checkpoint`).
+    The inventory is fetched once and shared with the RunSession probe.
+    Probes with a weight of 0 are not run, except the inventory when the
+    RunSession probe needs it. A probe that fails with any error scores 0, and
+    the others still report. When `stop_on_alert` ends the RunSession wait
+    before a validation SLX was visited, the RunSession probe has no score
+    (None) and is left out of the weighted score. Each probe's log lines are returned in its
+    details and written to the Robot log from the main thread.
+
+    With `push_partial_metrics`, each probe's score is pushed as soon as it
+    finishes, through `RW.Core.Push Metric` with sub_name `<prefix>_<probe>`.
+    Cheap probes are therefore reported before the RunSession wait ends. The
+    combined score is returned for the caller to push.
+
+    With `alert_severity`, new issues on the RunSession are checked on every
+    poll and alerted on from the main thread within about a poll interval,
+    as in `Wait For RunSession Tasks To Complete`.
+
+    :param rw_api_url: Base URL to the RunWhen API.
+    :param api_token: A platform.Secret token containing your bearer token.
+    :param rw_workspace: Short name of the workspace.
+    :param query: The task search query.
+    :param persona_shortname: Persona shortname (without the workspace prefix).
+    :param scope_slx_tags: Tags marking scope SLXs, as dicts or 'name:value' strings (default: systest:scope).
+    :param validation_slx_tags: Tags marking validation SLXs (default: systest:validate).
+    :param weights: Probe weights as a dict, a JSON object or "name:weight" pairs. Missing probes
+                    weigh 0. Default: index 1, runsession 1 (the original SLI score).
+    :param score_threshold: Minimum task score for the RunSession.
+    :param max_tasks_per_slx: Top-k tasks kept per SLX (None or 0: no limit).
+    :param max_tasks: Task budget for the RunSession (None or 0: no limit).
+    :param poll_interval: Seconds between RunSession polls.
+    :param max_wait_seconds: RunSession wait before checkpointing it for the next run.
+    :param checkpoint_max_age: See `Get RunSession Checkpoint`.
+    :param max_resumes: See `Get RunSession Checkpoint`.
+    :param push_partial_metrics: Push each probe's score as it finishes.
+    :param sub_name_prefix: Prefix for the partial metric sub names.
+    :param alert_severity: Alert on new RunSession issues of this severity or worse (None or 0: no alerts).
+    :param alert_action: "issue", "metric" or "both".
+    :param stop_on_alert: End the RunSession wait as soon as an alert is raised.
+    :return: A dict of the form:
+             {
+               "score": <weighted score, 0-1, or None if no probe was scored>,
+               "weights": {"<probe>": w},
+               "probes": {"<probe>": {"score", "seconds", "details": {..., "log": [...]}, "error"}},
+               "runsession": <last RunSession JSON, or None>,
+               "seconds": <wall time>
+             }
+    """
+    weights = _parse_weights(weights)
+    if not any(weights.values()):
+        raise ValueError("At least one SLI probe needs a positive weight.")
+    if alert_severity and alert_action not in _alerts.ALERT_ACTIONS:
+        raise ValueError(f"Unknown alert action {alert_action!r}; expected one of {_alerts.ALERT_ACTIONS}.")
+    ctx = {
+        "rw_api_url": rw_api_url,
+        "api_token": api_token,
+        "rw_workspace": rw_workspace,
+        "query": query,
+        "persona_shortname": persona_shortname,
+        "scope_pairs": _normalize_tag_pairs(scope_slx_tags or DEFAULT_SCOPE_SLX_TAGS),
+        "validation_pairs": _normalize_tag_pairs(validation_slx_tags or DEFAULT_VALIDATION_SLX_TAGS),
+        "score_threshold": score_threshold,
+        "max_tasks_per_slx": max_tasks_per_slx,
+        "max_tasks": max_tasks,
+        "poll_interval": poll_interval,
+        "max_wait_seconds": max_wait_seconds,
+        "checkpoint_max_age": checkpoint_max_age,
+        "max_resumes": max_resumes,
+        "alert_severity": alert_severity,
+        "alert_action": alert_action,
+        "stop_on_alert": stop_on_alert,
+        "alert_watch": None,
+        "runsession_data": None,
+    }
+    selected = [name for name in PROBES if weights[name] > 0]
+    if weights["runsession"] > 0 and "inventory" not in selected:
+        selected.append("inventory")
+
+    started = time.perf_counter()
+    results = {}
+    with futures.ThreadPoolExecutor(max_workers=len(selected) + 1) as pool:
+        if "inventory" in selected:
+            ctx["inventory"] = pool.submit(_inventory, ctx)
+        pending = {pool.submit(_timed, _PROBE_FUNCTIONS[name], ctx): name for name in selected}
+        # Wake up every poll interval to raise alerts queued by the RunSession probe.
+        wake = float(poll_interval) if alert_severity else None
+        while pending:
+            done, _ = futures.wait(pending, timeout=wake, return_when=futures.FIRST_COMPLETED)
+            if ctx["alert_watch"] is not None:
+                ctx["alert_watch"].flush()
+            for future in done:
+                name = pending.pop(future)
+                results[name] = future.result()
+                for line in results[name]["details"]["log"]:
+                    robot_logger.info(f"SLI probe '{name}': {line}")
+                robot_logger.info(
+                    f"SLI probe '{name}' scored {results[name]['score']} in {results[name]['seconds']}s"
+                    + (f" ({results[name]['error']})" if results[name]["error"] else "")
+                )
+                if push_partial_metrics and results[name]["score"] is not None:
+                    BuiltIn().run_keyword(
+                        "RW.Core.Push Metric", results[name]["score"], f"sub_name={sub_name_prefix}_{name}"
+                    )
+
+    scored = [name for name in results if results[name]["score"] is not None]
+    total_weight = sum(weights[name] for name in scored)
+    score = sum(weights[name] * results[name]["score"] for name in scored) / total_weight if total_weight else None
+    return {
+        "score": round(score, 4) if score is not None else None,
+        "weights": weights,
+        "probes": {name: results[name] for name in PROBES if name in results},
+        "runsession": ctx["runsession_data"],
+        "seconds": round(time.perf_counter() - started, 4),
+    }
@@ -0,0 +1,186 @@
+"""
+Opt-in profiling listener for the RW keyword libraries.
+
+Set RW_SYSTEST_PROFILE=true to have RW.Systest register this listener when it
+is imported; it then profiles calls to RW.Systest and RW.Workspace keywords
+with cProfile (CPU time, top call sites) and tracemalloc (allocation peak).
+Suites that don't import RW.Systest can attach it explicitly with
+`--listener RW.Systest.profiler.KeywordProfiler`.
+
+When the variable is unset, the listener is never registered, so there is no
+overhead at all. Optional settings:
+
+    RW_SYSTEST_PROFILE_LIBRARIES    comma separated libraries (default RW.Systest,RW.Workspace)
+    RW_SYSTEST_PROFILE_SAMPLE_RATE  fraction of keyword calls to profile (default 1.0)
+    RW_SYSTEST_PROFILE_MEMORY       false to skip tracemalloc (default true)
+    RW_SYSTEST_PROFILE_TOP_N        keywords shown in the report summary (default 10)
+
+Per-keyword results are written to keyword_profile.json in the output directory
+and a top-N summary is added to the report.
+"""
+
+import cProfile, os, pstats, random, time, tracemalloc
+from robot.libraries.BuiltIn import BuiltIn
+from robot.api import logger as robot_logger
+
+from RW import _codec
+from . import _state
+
+PROFILE_ENV = "RW_SYSTEST_PROFILE"
+_CALL_SITES_PER_KEYWORD = 5
+
+
+def profiling_enabled() -> bool:
+    return os.getenv(PROFILE_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class _KeywordStats:
+    __slots__ = ("calls", "profiled", "cpu", "wall", "peak", "profile")
+
+    def __init__(self):
+        self.calls = 0
+        self.profiled = 0
+        self.cpu = 0.0
+        self.wall = 0.0
+        self.peak = 0
+        self.profile = cProfile.Profile()
+
+    def call_sites(self, limit: int) -> list:
+        try:
+            stats = pstats.Stats(self.profile).stats
+        except TypeError:  # nothing was collected
+            return []
+        rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)
+        sites = []
+        for (filename, line, function), (_, ncalls, tottime, cumtime, _) in rows:
+            if filename == __file__:
+                continue
+            sites.append({
+                "site": f"{filename}:{line}({function})",
+                "ncalls": ncalls,
+                "tottime": round(tottime, 4),
+                "cumtime": round(cumtime, 4),
+            })
+            if len(sites) >= limit:
+                break
+        return sites
+
+
+class KeywordProfiler:
+    """Robot listener that profiles RW keyword library calls."""
+
+    ROBOT_LISTENER_API_VERSION = 2
+
+    def __init__(
+        self,
+        libraries: str = None,
+        sample_rate: float = None,
+        memory: str = None,
+        top_n: int = None,
+        artifact_filename: str = "keyword_profile.json"
+    ):
+        libraries = libraries or os.getenv("RW_SYSTEST_PROFILE_LIBRARIES", "RW.Systest,RW.Workspace")
+        self.libraries = {lib.strip() for lib in libraries.split(",") if lib.strip()}
+        self.sample_rate = float(sample_rate or os.getenv("RW_SYSTEST_PROFILE_SAMPLE_RATE", "1.0"))
+        memory = memory or os.getenv("RW_SYSTEST_PROFILE_MEMORY", "true")
+        self.memory = str(memory).strip().lower() not in ("0", "false", "no", "off")
+        self.top_n = int(top_n or os.getenv("RW_SYSTEST_PROFILE_TOP_N", "10"))
+        self.artifact_filename = artifact_filename
+        self._stats = {}
+        self._stack = []
+        self._written = False
+
+    # -- listener interface ------------------------------------------------
+
+    def start_keyword(self, name, attrs):
+        # Only outermost calls into the profiled libraries are measured;
+        # everything else just keeps the stack balanced.
+        if attrs.get("libname") not in self.libraries or any(self._stack):
+            self._stack.append(None)
+            return
+        stats = self._stats.setdefault(f"{attrs['libname']}.{attrs['kwname']}", _KeywordStats())
+        stats.calls += 1
+        if random.random() >= self.sample_rate:
+            self._stack.append(None)
+            return
+        try:
+            stats.profile.enable()
+        except ValueError:  # another profiler is already active
+            self._stack.append(None)
+            return
+        # Tracing only covers the sampled call, so unprofiled keywords don't
+        # pay for it; if something else is already tracing, leave it running.
+        memory_base, started_tracing = None, False
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            memory_base = tracemalloc.get_traced_memory()[0]
+        self._stack.append((stats, time.process_time(), time.perf_counter(), memory_base, started_tracing))
+
+    def end_keyword(self, name, attrs):
+        entry = self._stack.pop() if self._stack else None
+        if entry is None:
+            return
+        stats, cpu_start, wall_start, memory_base, started_tracing = entry
+        stats.profile.disable()
+        stats.profiled += 1
+        stats.cpu += time.process_time() - cpu_start
+        stats.wall += time.perf_counter() - wall_start
+        if memory_base is not None:
+            stats.peak = max(stats.peak, tracemalloc.get_traced_memory()[1] - memory_base)
+        if started_tracing:
+            tracemalloc.stop()
+
+    def end_suite(self, name, attrs):
+        # Report once, when the top-level suite finishes.
+        if attrs.get("id") == "s1":
+            self._write_results(add_to_report=True)
+
+    def close(self):
+        self._write_results(add_to_report=False)
+
+    # -- results -----------------------------------------------------------
+
+    def results(self) -> dict:
+        return {
+            name: {
+                "calls": stats.calls,
+                "profiled": stats.profiled,
+                "cpuSeconds": round(stats.cpu, 4),
+                "wallSeconds": round(stats.wall, 4),
+                "peakAllocKiB": round(stats.peak / 1024, 1),
+                "topCallSites": stats.call_sites(_CALL_SITES_PER_KEYWORD),
+            }
+            for name, stats in self._stats.items()
+        }
+
+    def summary(self, results: dict = None) -> str:
+        results = results if results is not None else self.results()
+        ranked = sorted(results.items(), key=lambda item: item[1]["cpuSeconds"], reverse=True)
+        lines = [f"{'Keyword':<56}{'Calls':>7}{'CPU(s)':>9}{'Wall(s)':>9}{'Peak KiB':>11}  Top call site"]
+        for name, data in ranked[:self.top_n]:
+            top_site = data["topCallSites"][0]["site"] if data["topCallSites"] else "-"
+            lines.append(
+                f"{name:<56}{data['calls']:>7}{data['cpuSeconds']:>9.3f}"
+                f"{data['wallSeconds']:>9.3f}{data['peakAllocKiB']:>11.1f}  {top_site}"
+            )
+        return "\n".join(lines)
+
+    def _write_results(self, add_to_report: bool):
+        if self._written or not self._stats:
+            return
+        self._written = True
+        results = self.results()
+        path = _state.artifact_path(self.artifact_filename)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(_codec.dumps(results))
+
+        summary = f"Keyword profile (top {self.top_n} by CPU, full results in {path}):\n{self.summary(results)}"
+        robot_logger.info(summary)
+        if add_to_report:
+            try:
+                BuiltIn().run_keyword("RW.Core.Add Pre To Report", summary)
+            except Exception as e:  # the profile must never fail the run
+                robot_logger.warn(f"Could not add keyword profile to the report: {e}")
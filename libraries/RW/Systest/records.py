@@ -0,0 +1,127 @@
+"""
+Compact SLX records for keywords that only need an SLX's short name, tags and
+group. Full SLX documents are fetched lazily, on demand.
+
+Scope: Global
+"""
+
+import json, sys
+
+from RW import _codec, _http, _lazy
+
+requests = _lazy.LazyModule("requests")
+
+# Every distinct (name, value) tag pair is stored once and shared by all records.
+_TAG_PAIRS = {}
+
+
+def _intern_tag(name, value) -> tuple:
+    pair = (name, value)
+    interned = _TAG_PAIRS.get(pair)
+    if interned is None:
+        interned = _TAG_PAIRS.setdefault(pair, (
+            sys.intern(name) if isinstance(name, str) else name,
+            sys.intern(value) if isinstance(value, str) else value,
+        ))
+    return interned
+
+
+class SlxRecord:
+    """
+    A slotted stand-in for an SLX document holding only shortName, tags and
+    group. Supports item access (`${slx["shortName"]}` in Robot); any other
+    key is served from the full document, which is loaded through the shared
+    `loader` on first access and then kept on that record only.
+
+    Records built without a loader (e.g. by `Get SLXs With Tags From Dict`,
+    which has no API access) have no document; accessing it raises LookupError.
+    """
+
+    __slots__ = ("shortName", "tags", "group", "_loader", "_doc")
+
+    def __init__(self, short_name: str, tags: tuple = (), group: str = None, loader=None):
+        self.shortName = short_name
+        self.tags = tags
+        self.group = group
+        self._loader = loader
+        self._doc = None
+
+    @classmethod
+    def from_slx(cls, slx: dict, group: str = None, loader=None) -> "SlxRecord":
+        tags = tuple(
+            _intern_tag(tag.get("name"), tag.get("value"))
+            for tag in slx.get("spec", {}).get("tags", []) or []
+        )
+        return cls(slx.get("shortName"), tags, group, loader)
+
+    @property
+    def doc(self) -> dict:
+        """The full SLX document, loaded on first access."""
+        if self._doc is None:
+            if self._loader is None:
+                raise LookupError(
+                    f"SLX '{self.shortName}' has no document loader; records built from an SLX "
+                    f"listing can only serve shortName, tags and group"
+                )
+            try:
+                self._doc = self._loader(self.shortName)
+            except (requests.RequestException, json.JSONDecodeError) as e:
+                raise LookupError(f"Could not load the document of SLX '{self.shortName}': {e}") from e
+        return self._doc
+
+    def has_any_tag(self, tag_pairs) -> bool:
+        return any(tag in tag_pairs for tag in self.tags)
+
+    def to_dict(self) -> dict:
+        return {
+            "shortName": self.shortName,
+            "tags": [{"name": name, "value": value} for name, value in self.tags],
+            "group": self.group,
+        }
+
+    def __getitem__(self, key):
+        if key == "shortName":
+            return self.shortName
+        if key == "tags":
+            return self.to_dict()["tags"]
+        if key == "group":
+            return self.group
+        return self.doc[key]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except (KeyError, LookupError):
+            return default
+
+    def __eq__(self, other):
+        if not isinstance(other, SlxRecord):
+            return NotImplemented
+        return (self.shortName, self.tags, self.group) == (other.shortName, other.tags, other.group)
+
+    def __hash__(self):
+        return hash((self.shortName, self.tags, self.group))
+
+    def __repr__(self):
+        return f"SlxRecord({self.shortName!r}, tags={list(self.tags)!r}, group={self.group!r})"
+
+
+class SlxDocumentLoader:
+    """Fetch single SLX documents from the API; shared by all records of a workspace."""
+
+    __slots__ = ("rw_api_url", "api_token", "rw_workspace")
+
+    def __init__(self, rw_api_url: str, api_token, rw_workspace: str):
+        self.rw_api_url = rw_api_url
+        self.api_token = api_token
+        self.rw_workspace = rw_workspace
+
+    def __call__(self, short_name: str) -> dict:
+        url = f"{self.rw_api_url}/workspaces/{self.rw_workspace}/slxs/{short_name}"
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_token.value}"
+        }
+        response = _http.request("GET", url, headers=headers, timeout=10)
+        response.raise_for_status()
+        return _codec.response_json(response)
@@ -1,12 +1,21 @@
-import re, logging, json, jmespath, requests, os, time
-from RW import platform
-from RW.Core import Core
+from __future__ import annotations
+
+import re, logging, json, os, time
 from datetime import datetime
 from robot.libraries.BuiltIn import BuiltIn
 from robot.api.deco import keyword
 from robot.api import logger as robot_logger
 
 from collections import Counter
+from typing import Union
+
+from RW import _cassette, _codec, _http, _lazy, _timings
+from . import _alerts, _caches
+from .records import SlxRecord, SlxDocumentLoader
+
+# Loaded on first use; suites pay for these only when a keyword needs them.
+requests = _lazy.LazyModule("requests")
+platform = _lazy.LazyModule("RW.platform")
 
 def get_visited_slx_and_tasks_from_runsession(runsession_data: dict):
     """
@@ -35,14 +44,55 @@ def get_visited_slx_and_tasks_from_runsession(runsession_data: dict):
         slx_map[slx_name] = tasks
     return slx_map
 
+def _iter_slx_pages(
+    rw_api_url: str,
+    api_token: platform.Secret,
+    rw_workspace: str,
+    params: dict = None
+):
+    """
+    Yield the workspace SLX listing one page payload at a time, following
+    the `next` links until the last page. Callers that only need a few fields
+    per SLX can drop each page once it has been processed.
+
+    `params` are only sent with the first request; the `next` links returned
+    by the API already carry the query string.
+    """
+    url     = f"{rw_api_url}/workspaces/{rw_workspace}/slxs"
+    headers = {
+        "Content-Type":  "application/json",
+        "Authorization": f"Bearer {api_token.value}",
+    }
+
+    while url:
+        response = _http.request("GET", url, headers=headers, params=params, timeout=10)
+        response.raise_for_status()
+
+        payload = _codec.response_json(response)  # one page
+        yield payload
+
+        url    = payload.get("next")            # None on last page
+        params = None
+
+@_timings.phase("inventory")
 def get_workspace_slxs(
     rw_api_url: str = "https://papi.beta.runwhen.com/api/v3",
     api_token: platform.Secret = None,
-    rw_workspace: str = "my-workspace"
+    rw_workspace: str = "my-workspace",
+    snapshot_filename: str = None,
+    native: bool = None
 ) -> str:
     """
     Get *all* SLXs in a RunWhen workspace, transparently handling pagination.
 
+    If `snapshot_filename` is set, the listing is also diffed against the
+    local inventory snapshot (see `Sync Workspace SLX Inventory`), and the
+    SLX caches are invalidated from the result. Every document is returned,
+    so this is always a full listing.
+
+    With `native=True` (or native passing enabled through `Set JSON Codec`)
+    the combined payload is returned as a dict rather than a JSON string.
+
     Returns:
         JSON string of the combined payload:
         {
@@ -53,33 +103,34 @@ def get_workspace_slxs(
         }
         On error, the empty string "" (unchanged behaviour).
     """
-    url     = f"{rw_api_url}/workspaces/{rw_workspace}/slxs"
-    headers = {
-        "Content-Type":  "application/json",
-        "Authorization": f"Bearer {api_token.value}",
-    }
-
     all_results = []
     total_count = None
 
     try:
-        while url:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
+        if snapshot_filename:
+            from .inventory import _sync_slx_snapshot
+            combined, diff = _sync_slx_snapshot(
+                rw_api_url, api_token, rw_workspace,
+                snapshot_filename=snapshot_filename, with_docs=True,
+            )
+            robot_logger.info(
+                f"SLX inventory diff for '{rw_workspace}' ({diff['mode']}): "
+                f"{len(diff['added'])} added, {len(diff['removed'])} removed, "
+                f"{len(diff['changed'])} changed ({len(diff['tagChanged'])} tag changes)"
+            )
+            return _codec.output(combined, native)
 
-            payload      = response.json()          # one page
+        for payload in _iter_slx_pages(rw_api_url, api_token, rw_workspace):
             total_count  = payload.get("count", 0)  # first page value is fine
             all_results += payload.get("results", [])
 
-            url = payload.get("next")               # None on last page
-
         combined = {
             "count":    len(all_results) if total_count is None else total_count,
             "next":     None,
             "previous": None,
             "results":  all_results,
         }
-        return json.dumps(combined)
+        return _codec.output(combined, native)
 
     except (requests.ConnectTimeout,
             requests.ConnectionError,
@@ -94,21 +145,29 @@ def get_workspace_slxs(
 
 def get_slxs_with_tags_from_dict(
     tag_list: list,
-    slx_data: str
+    slx_data: Union[str, dict, list],
+    compact: bool = False
 ) -> list:
     """
     Given a list of tags and a JSON string of SLX data,
     return all SLXs that match at least one of the specified tags.
 
     :param tag_list: A list of dicts, e.g. [{'name': 'tagkey', 'value': 'tagval'}, ...].
-    :param slx_data: A JSON string containing existing SLX data, typically from get_workspace_slxs().
-    :return: A list of SLX dicts that match any of the given tags.
+    :param slx_data: A JSON string (or parsed dict) containing existing SLX data, typically from
+                     get_workspace_slxs(), or a list of SlxRecords from get_workspace_slx_records().
+    :param compact: Return SlxRecords (shortName, tags, group) instead of full SLX dicts. These
+                    records have no document loader, so other keys are not available.
+    :return: A list of SLX dicts (or SlxRecords) that match any of the given tags.
     """
     if not slx_data:
         return []
 
+    tag_pairs = {(tag_item["name"], tag_item["value"]) for tag_item in tag_list}
+    if isinstance(slx_data, list):
+        return [record for record in slx_data if record.has_any_tag(tag_pairs)]
+
     try:
-        all_slxs = json.loads(slx_data)  # Parse the JSON content
+        all_slxs = _codec.as_object(slx_data)  # Parse the JSON content, unless already parsed
     except json.JSONDecodeError as e:
         warning_log(f"JSON decode error in slx_data: {e}")
         platform_logger.exception(e)
@@ -123,25 +182,25 @@ def get_slxs_with_tags_from_dict(
         tags = slx.get("spec", {}).get("tags", [])
         # Check if any of the SLX's tags match any tag in tag_list.
         for tag in tags:
-            if any(
-                tag_item["name"] == tag["name"] and tag_item["value"] == tag["value"]
-                for tag_item in tag_list
-            ):
-                matching_slxs.append(slx)
+            if (tag["name"], tag["value"]) in tag_pairs:
+                matching_slxs.append(SlxRecord.from_slx(slx) if compact else slx)
                 break  # Stop checking other tags for this SLX; we already found a match.
 
     return matching_slxs
 
+@_timings.phase("inventory")
 def get_slxs_with_tag(
     tag_list: list,
     rw_api_url: str = "https://papi.beta.runwhen.com/api/v3",
     api_token: platform.Secret = None,
     rw_workspace: str = "my-workspace",
+    compact: bool = False
 ) -> list:
     """Given a list of tags, return all SLXs in the workspace that have those tags.
 
     Args:
         tag_list (list): the given list of tags as dictionaries
+        compact (bool): return SlxRecords, loading full documents on demand
 
     Returns:
         list: List of SLXs that match the given tags
@@ -152,11 +211,12 @@ def get_slxs_with_tag(
         "Authorization": f"Bearer {api_token.value}"
         }
     matching_slxs = []
+    loader = SlxDocumentLoader(rw_api_url, api_token, rw_workspace) if compact else None
 
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = _http.request("GET", url, headers=headers, timeout=10)
         response.raise_for_status()  # Ensure we raise an exception for bad responses
-        all_slxs = response.json()  # Parse the JSON content
+        all_slxs = _codec.response_json(response)  # Parse the JSON content
         results = all_slxs.get("results", [])
 
         for result in results:
@@ -167,7 +227,9 @@ def get_slxs_with_tag(
                     and tag_item["value"] == tag["value"]
                     for tag_item in tag_list
                 ):
-                    matching_slxs.append(result)
+                    matching_slxs.append(
+                        SlxRecord.from_slx(result, loader=loader) if compact else result
+                    )
                     break
 
         return matching_slxs
@@ -184,6 +246,7 @@ def get_slxs_with_tag(
         platform_logger.exception(e)
         return []
 
+@_timings.phase("workspace_config")
 def get_workspace_config(
     rw_api_url: str = "https://papi.beta.runwhen.com/api/v3",
     api_token: platform.Secret = None,
@@ -201,7 +264,7 @@ def get_workspace_config(
     url = f"{rw_api_url}/workspaces/{rw_workspace}/branches/main/workspace.yaml?format=json"
 
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = _http.request("GET", url, headers=headers, timeout=10)
         response.raise_for_status() 
         workspace = response.json()  
         workspace_config = workspace.get("asJson", [])
@@ -244,6 +307,7 @@ def get_nearby_slxs(workspace_config: dict, slx_name: str) -> list:
     # If we don't find the slx in any group, return an empty list.
     return []
 
+@_timings.phase("index_status")
 def get_workspace_index_status(
     rw_api_url: str = "https://papi.beta.runwhen.com/api/v3",
     api_token: platform.Secret = None,
@@ -267,7 +331,7 @@ def get_workspace_index_status(
         "Authorization": f"Bearer {api_token.value}"
     }
 
-    resp = requests.get(url, headers=headers)
+    resp = _http.request("GET", url, headers=headers)
     resp.raise_for_status()
     data = resp.json()
 
@@ -285,13 +349,15 @@ def get_workspace_index_status(
     # Return both the extracted status and the full JSON
     return status_value, data
 
+@_timings.phase("task_search")
 def perform_task_search(
     rw_api_url: str = "https://papi.beta.runwhen.com/api/v3",
     api_token: platform.Secret = None,
     rw_workspace: str = "my-workspace",
     persona: str = None,
     query: str = "",
-    slx_scope: list = None
+    slx_scope: list = None,
+    use_cache: bool = False
 ):
     """
     Perform a task search in the given workspace with the specified persona and query.
@@ -302,6 +368,9 @@ def perform_task_search(
     :param persona: Persona shortname or None to default to <rw_workspace>--eager-edgar
     :param query: The search query (string).
     :param slx_scope: A list of slxShortNames to limit the search scope (optional).
+    :param use_cache: Reuse an earlier result for the same persona, query and scope.
+                      Cached results are dropped when an inventory sync reports a
+                      change to one of the scoped SLXs (or to any SLX, for an empty scope).
     
     :return: Parsed JSON response from the task-search endpoint.
     """
@@ -310,6 +379,13 @@ def perform_task_search(
     if persona is None:
         persona = f"{rw_workspace}--eager-edgar"
 
+    memo_key = (persona, query, tuple(sorted(slx_scope)))
+    if use_cache:
+        cached = _caches.TASK_SEARCH_MEMO.get(rw_workspace, memo_key)
+        if cached is not None:
+            robot_logger.info(f"Using cached task search result for query '{query}'")
+            return cached
+
     # Construct the POST URL and payload
     url = f"{rw_api_url}/workspaces/{rw_workspace}/task-search"
     payload = {
@@ -324,7 +400,7 @@ def perform_task_search(
 
     # Build a cURL command for troubleshooting
     # (masking or not masking token is up to you)
-    payload_json_str = json.dumps(payload)
+    payload_json_str = _codec.dumps(payload)
     curl_cmd = (
         f"curl -X POST '{url}' \\\n"
         f"  -H 'Content-Type: application/json' \\\n"
@@ -336,70 +412,46 @@ def perform_task_search(
     robot_logger.info(f"Performing task search POST:\n  URL: {url}\n  Payload: {payload}", html=False)
     robot_logger.info(f"Equivalent cURL:\n{curl_cmd}", html=False)
 
-    resp = requests.post(url, json=payload, headers=headers)
+    resp = _http.request("POST", url, json=payload, headers=headers)
     resp.raise_for_status()
 
     # Return the parsed JSON
-    return resp.json()
+    search_response = _codec.response_json(resp)
+    if use_cache:
+        _caches.TASK_SEARCH_MEMO.put(rw_workspace, memo_key, search_response, slxs=slx_scope)
+    return search_response
 
-def create_runsession_from_task_search(
-    search_response: dict,
-    api_token,  # platform.Secret
-    rw_api_url: str = "https://papi.beta.runwhen.com/api/v3",
-    rw_workspace: str = "t-online-boutique",
-    persona_shortname: str = "eager-edgar",
-    query: str = "",
-    score_threshold: float = 0.3,
-    curl_script_filename: str = "create_runsession_curl.sh"
-) -> dict:
+
+_TITLE_PUNCTUATION = re.compile(r"[`'\"]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize_task_title(title: str) -> str:
+    """Casefold and drop quoting/extra whitespace, e.g. "Check  `ns`" == "check ns"."""
+    return _WHITESPACE.sub(" ", _TITLE_PUNCTUATION.sub("", title)).strip().casefold()
+
+
+def _extract_task_candidates(tasks: list, rw_workspace: str) -> list:
     """
-    Create a RunSession from tasks in `search_response`, filtering by `score_threshold`.
+    Return (score, slxName, title) for each task-search result, in result order.
 
-    This version detects which structure is present:
+    Handles both result structures:
       - New structure (workspaceTask + extra fields).
       - Old structure (top-level fields like slxShortName, taskName, etc.).
-
-    :param search_response: Dict containing the "tasks" array in either structure.
-    :param api_token: platform.Secret (token for auth)
-    :param rw_api_url: Base URL for RunWhen
-    :param rw_workspace: Short name of the workspace
-    :param persona_shortname: Persona for the runsession
-    :param query: The user query that led to these tasks
-    :param score_threshold: Minimum score for tasks to include
-    :param curl_script_filename: Name of the .sh file to write the curl command
-    :return: JSON response from creating the RunSession
+    SLX names are prefixed with the workspace if needed; results without an
+    SLX or title are skipped.
     """
-    url = f"{rw_api_url}/workspaces/{rw_workspace}/runsessions"
-
-    tasks = search_response.get("tasks", [])
     if not tasks:
-        robot_logger.info("No tasks found in search_response.")
-        return {}
-
-    # --------------------------------------------------
-    # 1) Detect which structure is being used
-    # --------------------------------------------------
-    first_task = tasks[0]
+        return []
     # If it has workspaceTask, call that the NEW structure
-    if "workspaceTask" in first_task:
+    is_new_structure = "workspaceTask" in tasks[0]
+    if is_new_structure:
         robot_logger.info("Detected **new** structure (workspaceTask).")
-        is_new_structure = True
     else:
         robot_logger.info("Detected **old** structure (top-level slxShortName/taskName).")
-        is_new_structure = False
-
-    run_requests_map = {}
 
+    candidates = []
     for t in tasks:
-        # --------------------------------------------------
-        # 2) Skip if score below threshold
-        # --------------------------------------------------
-        if t.get("score", 0) < score_threshold:
-            continue
-
-        # --------------------------------------------------
-        # 3) Extract fields from the correct location
-        # --------------------------------------------------
         if is_new_structure:
             # The "new" structure has everything in workspaceTask
             ws_task = t.get("workspaceTask", {})
@@ -411,38 +463,169 @@ def create_runsession_from_task_search(
             slx_candidate = t.get("slxShortName") or t.get("slxName")
             task_candidate = t.get("taskName") or t.get("resolvedTaskName")
 
-        # --------------------------------------------------
-        # 4) Prepend workspace prefix if missing
-        # --------------------------------------------------
+        # Prepend workspace prefix if missing
         if slx_candidate and not slx_candidate.startswith(f"{rw_workspace}--"):
             slx_candidate = f"{rw_workspace}--{slx_candidate}"
 
         # Skip if we don't have enough info
         if not slx_candidate or not task_candidate:
             continue
+        candidates.append((t.get("score", 0), slx_candidate, task_candidate))
+    return candidates
+
+
+def plan_runsession_from_task_search(
+    search_response: dict,
+    rw_workspace: str = "t-online-boutique",
+    persona_shortname: str = "eager-edgar",
+    query: str = "",
+    score_threshold: float = 0.3,
+    max_tasks_per_slx: int = None,
+    max_tasks: int = None,
+    dedupe_titles: bool = True
+) -> dict:
+    """
+    Shape task-search results into the RunSession payload that `Create RunSession
+    from Task Search` would post, without posting it.
+
+    Tasks below `score_threshold` are dropped; the rest are taken in descending
+    score order (ties keep the search order). With `dedupe_titles`, a task whose
+    title matches one already selected for the same SLX, exactly or after
+    normalisation (case, quoting, whitespace), is dropped. Each SLX keeps at most
+    `max_tasks_per_slx` tasks, and at most `max_tasks` are selected overall.
+    Limits of None or 0 mean no limit.
+
+    :param search_response: Dict containing the "tasks" array in either structure.
+    :param rw_workspace: Short name of the workspace
+    :param persona_shortname: Persona for the runsession
+    :param query: The user query that led to these tasks
+    :param score_threshold: Minimum score for tasks to include
+    :param max_tasks_per_slx: Top-k tasks kept per SLX.
+    :param max_tasks: Global task budget for the RunSession.
+    :param dedupe_titles: Drop duplicate titles within an SLX.
+    :return: A dict of the form:
+             {
+               "sessionBody": {... payload to POST ...},
+               "selected": [{"slxName", "title", "score"}, ...],
+               "taskCount": <int>, "slxCount": <int>,
+               "dropped": {"belowThreshold", "duplicate", "perSlxLimit", "budget"}
+             }
+    """
+    candidates = _extract_task_candidates(search_response.get("tasks", []), rw_workspace)
+    dropped = {"belowThreshold": 0, "duplicate": 0, "perSlxLimit": 0, "budget": 0}
+
+    eligible = []
+    for candidate in candidates:
+        if candidate[0] < score_threshold:
+            dropped["belowThreshold"] += 1
+        else:
+            eligible.append(candidate)
+    # sorted() is stable, so equal scores keep the order the search returned them in.
+    eligible.sort(key=lambda candidate: candidate[0], reverse=True)
 
-        # --------------------------------------------------
-        # 5) Accumulate run requests by slx
-        # --------------------------------------------------
-        if slx_candidate not in run_requests_map:
-            run_requests_map[slx_candidate] = {
-                "slxName": slx_candidate,
+    run_requests_map = {}
+    seen_titles = set()
+    selected = []
+    for score, slx_name, title in eligible:
+        if dedupe_titles:
+            title_key = (slx_name, _normalize_task_title(title))
+            if title_key in seen_titles:
+                dropped["duplicate"] += 1
+                continue
+        run_request = run_requests_map.get(slx_name)
+        if max_tasks_per_slx and run_request and len(run_request["taskTitles"]) >= max_tasks_per_slx:
+            dropped["perSlxLimit"] += 1
+            continue
+        if max_tasks and len(selected) >= max_tasks:
+            dropped["budget"] += 1
+            continue
+        if dedupe_titles:
+            seen_titles.add(title_key)
+        if run_request is None:
+            run_request = run_requests_map[slx_name] = {
+                "slxName": slx_name,
                 "taskTitles": [],
                 "fromSearchQuery": query,
                 "fromIssue": None
             }
-        run_requests_map[slx_candidate]["taskTitles"].append(task_candidate)
+        run_request["taskTitles"].append(title)
+        selected.append({"slxName": slx_name, "title": title, "score": score})
 
-    # --------------------------------------------------
-    # 6) Build final payload
-    # --------------------------------------------------
-    run_requests = list(run_requests_map.values())
     session_body = {
         "generateName": "automated-systest",
-        "runRequests": run_requests,
+        "runRequests": list(run_requests_map.values()),
         "personaShortName": persona_shortname,
         "active": True
     }
+    robot_logger.info(
+        f"RunSession plan: {len(selected)} tasks on {len(run_requests_map)} SLXs "
+        f"from {len(candidates)} search results (dropped: {dropped})"
+    )
+    return {
+        "sessionBody": session_body,
+        "selected": selected,
+        "taskCount": len(selected),
+        "slxCount": len(run_requests_map),
+        "dropped": dropped,
+    }
+
+
+@_timings.phase("runsession_create")
+def create_runsession_from_task_search(
+    search_response: dict,
+    api_token,  # platform.Secret
+    rw_api_url: str = "https://papi.beta.runwhen.com/api/v3",
+    rw_workspace: str = "t-online-boutique",
+    persona_shortname: str = "eager-edgar",
+    query: str = "",
+    score_threshold: float = 0.3,
+    curl_script_filename: str = "create_runsession_curl.sh",
+    max_tasks_per_slx: int = None,
+    max_tasks: int = None,
+    dedupe_titles: bool = True,
+    dry_run: bool = False
+) -> dict:
+    """
+    Create a RunSession from tasks in `search_response`, filtering by `score_threshold`.
+
+    The tasks are shaped by `Plan RunSession from Task Search` first (score
+    ordering, duplicate titles, top-k per SLX and a global task budget), see
+    that keyword for details. Both the new (workspaceTask) and old (top-level
+    fields) result structures are supported.
+
+    :param search_response: Dict containing the "tasks" array in either structure.
+    :param api_token: platform.Secret (token for auth)
+    :param rw_api_url: Base URL for RunWhen
+    :param rw_workspace: Short name of the workspace
+    :param persona_shortname: Persona for the runsession
+    :param query: The user query that led to these tasks
+    :param score_threshold: Minimum score for tasks to include
+    :param curl_script_filename: Name of the .sh file to write the curl command
+    :param max_tasks_per_slx: Top-k tasks kept per SLX (None or 0: no limit).
+    :param max_tasks: Global task budget (None or 0: no limit).
+    :param dedupe_titles: Drop duplicate titles within an SLX.
+    :param dry_run: Return the plan instead of creating the RunSession.
+    :return: JSON response from creating the RunSession (the plan with `dry_run`)
+    """
+    url = f"{rw_api_url}/workspaces/{rw_workspace}/runsessions"
+
+    if not search_response.get("tasks", []):
+        robot_logger.info("No tasks found in search_response.")
+        return {}
+
+    plan = plan_runsession_from_task_search(
+        search_response,
+        rw_workspace=rw_workspace,
+        persona_shortname=persona_shortname,
+        query=query,
+        score_threshold=score_threshold,
+        max_tasks_per_slx=max_tasks_per_slx,
+        max_tasks=max_tasks,
+        dedupe_titles=dedupe_titles,
+    )
+    if dry_run:
+        return plan
+    session_body = plan["sessionBody"]
 
     headers = {
         "Content-Type": "application/json",
@@ -450,9 +633,9 @@ def create_runsession_from_task_search(
     }
 
     # --------------------------------------------------
-    # 7) Debugging: Build cURL command
+    # Debugging: Build cURL command
     # --------------------------------------------------
-    payload_json_str = json.dumps(session_body)
+    payload_json_str = _codec.dumps(session_body)
     curl_cmd = (
         f"curl -X POST '{url}' \\\n"
         f"  -H 'Content-Type: application/json' \\\n"
@@ -466,24 +649,37 @@ def create_runsession_from_task_search(
     robot_logger.info(f"Equivalent cURL:\n{curl_cmd}", html=False)
 
     # --------------------------------------------------
-    # 8) POST & return the RunSession response
+    # POST & return the RunSession response
     # --------------------------------------------------
-    resp = requests.post(url, json=session_body, headers=headers)
+    resp = _http.request("POST", url, json=session_body, headers=headers)
     resp.raise_for_status()
-    return resp.json()
+    return _codec.response_json(resp)
 
 
+@_timings.phase("runsession_wait")
 def wait_for_runsession_tasks_to_complete(
     rw_workspace: str,
     runsession_id: int,
     rw_api_url: str,
     api_token: platform.Secret,
     poll_interval: float = 5.0,
-    max_wait_seconds: float = 300.0
+    max_wait_seconds: float = 300.0,
+    alert_severity: int = None,
+    alert_action: str = "issue",
+    stop_on_alert: bool = False
 ) -> dict:
     """
     Polls the RunSession until the number of runRequests stops growing
     for two consecutive checks, or until max_wait_seconds has passed.
+
+    With `alert_severity`, the issues that arrive with each poll are checked
+    as they come in. Every new open issue of that severity or worse (1 is
+    critical) raises `RW.Core.Add Issue` (alert_action "issue"), a running
+    count pushed with `RW.Core.Push Metric` under sub_name "severe_issues"
+    ("metric"), or both ("both"). With `stop_on_alert`, the wait ends at the
+    first such issue and the RunSession JSON of that poll is returned; it is
+    a partial RunSession, so callers should not judge which SLXs it visited
+    (`Get Open Issues` with `max_severity` tells whether that happened).
     
     :param rw_workspace: The short name of the workspace (e.g. "t-online-boutique").
     :param runsession_id: The integer ID of the RunSession to monitor.
@@ -491,24 +687,59 @@ def wait_for_runsession_tasks_to_complete(
     :param api_token: The raw authorization token string.
     :param poll_interval: Seconds to wait between polls. Default 5s.
     :param max_wait_seconds: Stop polling after this many seconds. Default 300s (5 min).
+    :param alert_severity: Alert on new issues of this severity or worse (None or 0: no alerts).
+    :param alert_action: "issue", "metric" or "both".
+    :param stop_on_alert: Return as soon as an alert is raised.
     :return: The final RunSession JSON once stable, or the last JSON if timeout is reached.
     :raises TimeoutError: If we never see stability before max_wait_seconds.
     """
+    watch = None
+    if alert_severity:
+        watch = _alerts.SeverityWatch(
+            rw_workspace, runsession_id, rw_api_url, alert_severity, action=alert_action, stop=stop_on_alert,
+        )
+    return _poll_runsession(
+        rw_workspace, runsession_id, rw_api_url, api_token,
+        poll_interval=poll_interval, max_wait_seconds=max_wait_seconds,
+        on_poll=watch.inspect if watch else None,
+    )
+
+
+def _poll_runsession(
+    rw_workspace: str,
+    runsession_id: int,
+    rw_api_url: str,
+    api_token: platform.Secret,
+    poll_interval: float = 5.0,
+    max_wait_seconds: float = 300.0,
+    on_poll=None
+) -> dict:
+    """
+    The polling loop behind `Wait For RunSession Tasks To Complete`.
+    `on_poll(session_data)` is called after every fetch, e.g. to timestamp
+    the first runRequest in the load test; if it returns True, polling stops
+    and that session_data is returned.
+    """
     endpoint = f"{rw_api_url}/workspaces/{rw_workspace}/runsessions/{runsession_id}"
     headers = {
         "Authorization": f"Bearer {api_token.value}",
         "Accept": "application/json"
     }
     
-    start_time = time.time()
+    start_time = _cassette.clock()
     stable_count = 0   # How many consecutive times the count has remained unchanged
     last_length = None
     
     while True:
         # 1) Fetch the RunSession JSON
-        resp = requests.get(endpoint, headers=headers)
+        resp = _http.request("GET", endpoint, headers=headers)
         resp.raise_for_status()
-        session_data = resp.json()
+        session_data = _codec.response_json(resp)
+        if on_poll is not None and on_poll(session_data):
+            robot_logger.info(
+                f"RunSession {runsession_id} wait stopped early with {len(session_data.get('runRequests', []))} runRequests."
+            )
+            return session_data
         
         # 2) Count the runRequests
         run_requests = session_data.get("runRequests", [])
@@ -529,17 +760,44 @@ def wait_for_runsession_tasks_to_complete(
             return session_data
         
         # 5) Check for timeout
-        elapsed = time.time() - start_time
+        elapsed = _cassette.clock() - start_time
         if elapsed > max_wait_seconds:
             raise TimeoutError(
                 f"RunSession {runsession_id} did not stabilize within {max_wait_seconds} seconds."
             )
         
         # 6) Sleep before next poll
-        time.sleep(poll_interval)
+        _cassette.sleep(poll_interval)
     return session_data
 
 
+def close_runsession(
+    rw_workspace: str,
+    runsession_id: int,
+    rw_api_url: str,
+    api_token: platform.Secret
+) -> dict:
+    """
+    Mark a RunSession as inactive (PATCH active=false), so it stops taking
+    runners, e.g. when an abandoned systest RunSession is not going to be resumed.
+
+    :param rw_workspace: The short name of the workspace.
+    :param runsession_id: The integer ID of the RunSession to close.
+    :param rw_api_url: Base URL to the RunWhen API.
+    :param api_token: A platform.Secret token containing your bearer token.
+    :return: The PATCH response JSON.
+    """
+    url = f"{rw_api_url}/workspaces/{rw_workspace}/runsessions/{runsession_id}"
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_token.value}"
+    }
+    resp = _http.request("PATCH", url, json={"active": False}, headers=headers)
+    resp.raise_for_status()
+    robot_logger.info(f"Closed RunSession {runsession_id} in '{rw_workspace}'.")
+    return _codec.response_json(resp)
+
+
 def get_runsession_url(rw_runsession=None):
     """Return a direct link to the RunSession."""
     try:
@@ -599,23 +857,33 @@ def get_runsession_source(payload: dict) -> str:
     return "Unknown"
 
 
-def count_open_issues(data: str):
-    """Return a count of issues that have not been closed."""
+def count_open_issues(data: Union[str, dict]):
+    """Return a count of issues that have not been closed.
+
+    `data` may be a RunSession JSON string or an already parsed dict.
+    """
     open_issues = 0 
-    runsession = json.loads(data) 
+    runsession = _codec.as_object(data) 
     for run_request in runsession.get("runRequests", []):
         for issue in run_request.get("issues", []): 
             if not issue["closed"]:
                 open_issues+=1
     return(open_issues)
 
-def get_open_issues(data: str):
-    """Return a count of issues that have not been closed."""
+def get_open_issues(data: Union[str, dict], max_severity: int = None):
+    """Return a list of issues that have not been closed.
+
+    `data` may be a RunSession JSON string or an already parsed dict. With
+    `max_severity`, only issues of that severity or worse (1 is critical)
+    are returned; 0 returns none.
+    """
     open_issue_list = []
-    runsession = json.loads(data) 
+    runsession = _codec.as_object(data) 
     for run_request in runsession.get("runRequests", []):
         for issue in run_request.get("issues", []): 
             if not issue["closed"]:
+                if max_severity is not None and int(issue.get("severity") or 5) > int(max_severity):
+                    continue
                 open_issue_list.append(issue)
     return open_issue_list
 
@@ -638,30 +906,20 @@ def generate_open_issue_markdown_table(data_list):
     
     return markdown_output
 
-def get_open_issues(data: str):
-    """Return a count of issues that have not been closed."""
-    open_issue_list = []
-    runsession = json.loads(data) 
-    for run_request in runsession.get("runRequests", []):
-        for issue in run_request.get("issues", []): 
-            if not issue["closed"]:
-                open_issue_list.append(issue)
-    return open_issue_list
-
-def summarize_runsession_users(data: str, output_format: str = "text") -> str:
+def summarize_runsession_users(data: Union[str, dict], output_format: str = "text") -> str:
     """
     Parse a JSON string representing a RunWhen 'runsession' object
     (with 'runRequests' entries), gather the unique participants and
     the engineering assistants involved, and return a summary in either
     plain text or Markdown format.
 
-    :param data: JSON string with top-level 'runRequests' list, each item
+    :param data: JSON string (or parsed dict) with top-level 'runRequests' list, each item
                  possibly containing 'requester' and 'persona->spec->fullName'.
     :param output_format: "text" or "markdown" (default: "text").
     :return: A string summarizing the participants and engineering assistants.
     """
     try:
-        runsession = json.loads(data)
+        runsession = _codec.as_object(data)
     except json.JSONDecodeError:
         # If the payload is not valid JSON, handle or raise
         return "Error: Could not decode JSON from input."
@@ -714,8 +972,17 @@ def summarize_runsession_users(data: str, output_format: str = "text") -> str:
             text_lines.append(f"  - {assistant}")
         return "\n".join(text_lines)
 
-def extract_issue_keywords(data: str):
-    runsession = json.loads(data) 
+# Resources are referenced in issue titles in backticks, e.g. "Pod `cart-7d9` is restarting".
+_BACKTICKED = re.compile(r"`(.*?)`")
+
+
+def _issue_resources(issue: dict) -> list:
+    """The backticked resource names in an issue title."""
+    return _BACKTICKED.findall(issue.get("title") or "")
+
+
+def extract_issue_keywords(data: Union[str, dict]):
+    runsession = _codec.as_object(data) 
     issue_keywords = set()
     
     for request in runsession.get("runRequests", []):
@@ -723,13 +990,12 @@ def extract_issue_keywords(data: str):
         
         for issue in issues:
             if not issue.get("closed", False):
-                matches = re.findall(r'`(.*?)`', issue.get("title", ""))
-                issue_keywords.update(matches)
+                issue_keywords.update(_issue_resources(issue))
     
     return list(issue_keywords)
 
-def get_most_referenced_resource(data: str):
-    runsession = json.loads(data) 
+def get_most_referenced_resource(data: Union[str, dict]):
+    runsession = _codec.as_object(data) 
     
     keyword_counter = Counter()
     
@@ -737,10 +1003,28 @@ def get_most_referenced_resource(data: str):
         issues = request.get("issues", [])
         
         for issue in issues:
-            matches = re.findall(r'`(.*?)`', issue.get("title", ""))
-            keyword_counter.update(matches)
+            keyword_counter.update(_issue_resources(issue))
     
     most_common_resource = keyword_counter.most_common(1)
     
     return most_common_resource[0][0] if most_common_resource else "No keywords found"
-    
\ No newline at end of file
+
+
+def set_json_codec(codec: str = "json", native_objects: bool = None) -> str:
+    """
+    Select the JSON codec used by the Systest and Workspace keywords, and
+    optionally turn on native object passing.
+
+    With native passing on, keywords that used to return JSON strings
+    (`Get Workspace SLXs`, `Import RunSession Details`, `Import Memo Variable`)
+    return parsed objects instead. Consumers such as `Count Open Issues` accept
+    either form, so enabling it only removes serialisation round trips.
+
+    :param codec: "json" (stdlib, the default), "orjson", or "auto" (orjson when installed).
+                  orjson output has no spaces after separators, so JSON strings change.
+    :param native_objects: True/False to change native passing, None to leave it as is.
+    :return: The name of the active codec.
+    """
+    name = _codec.set_codec(codec, native_objects)
+    robot_logger.info(f"JSON codec: {name}, native objects: {_codec.native_default()}")
+    return name
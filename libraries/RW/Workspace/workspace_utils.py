@@ -4,12 +4,15 @@ Workspace keyword library for performing tasks for interacting with Workspace re
 Scope: Global
 """
 
-import re, logging, json, jmespath, requests, os
+import re, logging, json, os
 from datetime import datetime
 from robot.libraries.BuiltIn import BuiltIn
 
-from RW import platform
-from RW.Core import Core
+from RW import _codec, _http, _lazy, _slx_caches
+
+# Loaded on first use; suites pay for these only when a keyword needs them.
+requests = _lazy.LazyModule("requests")
+platform = _lazy.LazyModule("RW.platform")
 
 # import bare names for robot keyword names
 # from .platform_utils import *
@@ -19,6 +22,9 @@ logger = logging.getLogger(__name__)
 
 ROBOT_LIBRARY_SCOPE = "GLOBAL"
 
+# Runbook tasks per SLX; inventory syncs drop the entries of changed SLXs.
+_RUNBOOK_TASKS = _slx_caches.get_cache("runbook-tasks")
+
 SHELL_HISTORY: list[str] = []
 SECRET_PREFIX = "secret__"
 SECRET_FILE_PREFIX = "secret_file__"
@@ -48,7 +54,7 @@ def get_slxs_with_tag(
     matching_slxs = []
 
     try:
-        response = s.get(url, timeout=10)
+        response = _http.request("GET", url, session=s, timeout=10)
         response.raise_for_status()  # Ensure we raise an exception for bad responses
         all_slxs = response.json()  # Parse the JSON content
         results = all_slxs.get("results", [])
@@ -101,13 +107,18 @@ def run_tasks_for_slx(
 
 
     # Get all tasks for slx and concat into string separated by ||
+    # The runbook task list is cached per SLX and dropped when an inventory
+    # sync reports that the SLX changed.
     slx_url = f"{rw_workspace_api_url}/{rw_workspace}/slxs/{slx}/runbook"
 
     try:
-        slx_response = s.get(slx_url, timeout=10)
-        slx_response.raise_for_status()
-        slx_data = slx_response.json()  # Parse JSON content
-        tasks = slx_data.get("status", {}).get("codeBundle", {}).get("tasks", [])
+        tasks = _RUNBOOK_TASKS.get(rw_workspace, slx)
+        if tasks is None:
+            slx_response = _http.request("GET", slx_url, session=s, timeout=10)
+            slx_response.raise_for_status()
+            slx_data = slx_response.json()  # Parse JSON content
+            tasks = slx_data.get("status", {}).get("codeBundle", {}).get("tasks", [])
+            _RUNBOOK_TASKS.put(rw_workspace, slx, tasks, slxs=[slx])
     except (
         requests.ConnectTimeout,
         requests.ConnectionError,
@@ -134,7 +145,7 @@ def run_tasks_for_slx(
     rs_url = f"{rw_workspace_api_url}/{rw_workspace}/runsessions/{rw_runsession}"
 
     try:
-        response = s.patch(rs_url, json=runrequest_details, timeout=10)
+        response = _http.request("PATCH", rs_url, session=s, json=runrequest_details, timeout=10)
         response.raise_for_status()  # Ensure we raise an exception for bad responses
         return response.json()
 
@@ -151,7 +162,7 @@ def run_tasks_for_slx(
         platform_logger.exception(e)
         return []
 
-def import_runsession_details(rw_runsession=None):
+def import_runsession_details(rw_runsession=None, native: bool = None):
     """
     Fetch full RunSession details in JSON format.
     If RW_USER_TOKEN is set, use it instead of the built-in token,
@@ -159,6 +170,8 @@ def import_runsession_details(rw_runsession=None):
 
     :param rw_runsession: (optional) The run session ID to fetch. 
                           If not provided, uses RW_SESSION_ID from platform variables.
+    :param native: (optional) Return the parsed dict instead of a JSON string.
+                   Defaults to the mode selected with `RW.Systest.Set JSON Codec`.
     :return: JSON-encoded string of the run session details or None on error.
     """
     try:
@@ -184,13 +197,14 @@ def import_runsession_details(rw_runsession=None):
         session = platform.get_authenticated_session()
 
     try:
-        rsp = session.get(url, timeout=10, verify=platform.REQUEST_VERIFY)
+        rsp = _http.request("GET", url, session=session, timeout=10, verify=platform.REQUEST_VERIFY)
         rsp.raise_for_status()
-        return json.dumps(rsp.json())
+        # In native mode the parsed body is handed over without re-encoding it.
+        return _codec.output(_codec.response_json(rsp), native)
     except (requests.ConnectTimeout, requests.ConnectionError, json.JSONDecodeError) as e:
         warning_log(f"Exception while trying to get runsession details: {e}", str(e), str(type(e)))
         platform_logger.exception(e)
-        return json.dumps(None)
+        return _codec.output(None, native)
 
 
 
@@ -200,10 +214,13 @@ def import_runsession_details(rw_runsession=None):
 ## The main difference here is that we fetch the memo from the runsession instead
 ## of the runrequest - and as well we return valid json, which wouldn't be appropriate
 ## for all memo keys, but works for the Json payload. 
-def import_memo_variable(key: str):
+def import_memo_variable(key: str, native: bool = None):
     """If this is a runbook, the runsession / runrequest may have been initiated with
     a memo value. Get the value for key within the memo, or None if there was no
     value found or if there was no memo provided (e.g. with an SLI)
+
+    With `native` (or native passing enabled through `RW.Systest.Set JSON Codec`)
+    the value is returned as-is instead of JSON-encoded.
     """
     try:
         runrequest_id = str(import_platform_variable("RW_RUNREQUEST_ID"))
@@ -219,8 +236,8 @@ def import_memo_variable(key: str):
     BuiltIn().log(f"Importing memo variable with URL: {url}, runrequest {runrequest_id}", level='INFO')
 
     try:
-        rsp = s.get(url, timeout=10, verify=platform.REQUEST_VERIFY)
-        run_requests = rsp.json().get("runRequests", [])
+        rsp = _http.request("GET", url, session=s, timeout=10, verify=platform.REQUEST_VERIFY)
+        run_requests = _codec.response_json(rsp).get("runRequests", [])
         for run_request in run_requests:
             if str(run_request.get("id")) == runrequest_id:
                 memo_list = run_request.get("memo", [])
@@ -230,17 +247,18 @@ def import_memo_variable(key: str):
                             # Ensure the value is JSON-serializable
                             ## TODO Handle non json memo data
                             value = memo[key]
+                            if _codec.native_default(native):
+                                return value  # Parsed from the response, no re-encoding needed
                             try:
-                                json.dumps(value)  # Check if value is JSON serializable
-                                return json.dumps(value)  # Return as JSON string
+                                return _codec.dumps(value)  # Return as JSON string
                             except (TypeError, ValueError):
                                 BuiltIn().log(f"Value for key '{key}' is not JSON-serializable: {value}", level='WARN')
-                                return json.dumps(str(value))  # Convert non-serializable value to string
-        return json.dumps(None)
+                                return _codec.dumps(str(value))  # Convert non-serializable value to string
+        return _codec.output(None, native)
     except (requests.ConnectTimeout, requests.ConnectionError, json.JSONDecodeError) as e:
         warning_log(f"Exception while trying to get memo: {e}", str(e), str(type(e)))
         platform_logger.exception(e)
-        return json.dumps(None)
+        return _codec.output(None, native)
 
 def import_platform_variable(varname: str) -> str:
     """
@@ -260,7 +278,7 @@ def import_platform_variable(varname: str) -> str:
     return val
 
 
-def import_related_runsession_details(json_string):
+def import_related_runsession_details(json_string, native: bool = None):
     """
     This keyword:
       1. Parses the provided JSON string into a Python dictionary.
@@ -268,18 +286,19 @@ def import_related_runsession_details(json_string):
       3. Calls 'import_runsession_details' with that runsession ID.
       4. Returns the JSON string with the runsession details, or None on error.
 
-    :param json_string: (str) The full JSON of the run session record. 
+    :param json_string: (str) The full JSON of the run session record, or the parsed dict. 
                         Must contain a 'notes' field that holds a JSON string 
                         with a 'runsessionId' key.
+    :param native: (optional) Return the parsed dict instead of a JSON string.
     :return: (str) JSON-encoded string containing the runsession details, or None on error.
     """
     # Parse the main JSON data
-    data = json.loads(json_string)
+    data = _codec.as_object(json_string)
     
     # 'notes' is itself a JSON string, so parse again
     notes_str = data.get("notes", "{}")
     try:
-        notes_data = json.loads(notes_str)
+        notes_data = _codec.as_object(notes_str)
     except json.JSONDecodeError:
         BuiltIn().log("Unable to parse 'notes' field as JSON. Returning None.", level="WARN")
         return None
@@ -294,6 +313,6 @@ def import_related_runsession_details(json_string):
     
     BuiltIn().log(f"Fetching runsession details for ID: {runsession_id}", level="INFO")
     # Call the updated import_runsession_details, passing the runsession ID
-    details_json = import_runsession_details(rw_runsession=runsession_id)
+    details_json = import_runsession_details(rw_runsession=runsession_id, native=native)
 
     return details_json
\ No newline at end of file
@@ -0,0 +1,292 @@
+"""
+Record/replay of PAPI exchanges made through `_http.request`.
+
+In record mode every exchange is captured and written to a cassette file when
+the cassette is stopped (or the process exits). In replay mode the cassette
+answers the requests instead of the network, so a whole systest run can be
+repeated offline in seconds.
+
+Cassettes store request paths without the host, so a recording made against
+one PAPI URL replays against any other. Authorization headers are never
+stored; bearer tokens seen while recording are scrubbed from the recorded
+bodies, as are values of secret-looking keys and query parameters.
+
+Requests are matched on method, path and query, preferring an entry with the
+same body. Repeated requests (RunSession polls) are served in recorded order,
+and the last response is repeated once they run out.
+
+Sleeps made through `sleep()` are scaled by `time_scale` during replay (0 by
+default, i.e. no sleeping), while `clock()` still advances by the full
+interval, so timeouts trigger after the same number of polls as recorded.
+
+The cassette can be enabled without changing any suite:
+    RW_SYSTEST_CASSETTE             cassette path (.json, or .json.gz for gzip)
+    RW_SYSTEST_CASSETTE_MODE        record | replay (default replay)
+    RW_SYSTEST_CASSETTE_TIME_SCALE  sleep factor during replay (default 0)
+"""
+
+from __future__ import annotations
+
+import atexit, gzip, http.client, os, re, threading, time
+from collections import deque
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from . import _codec, _lazy
+
+requests = _lazy.LazyModule("requests")
+
+CASSETTE_ENV = "RW_SYSTEST_CASSETTE"
+MODES = ("record", "replay")
+REDACTED = "***REDACTED***"
+_SECRET_KEY = re.compile(r"token|password|secret|authorization|api[_-]?key|^access$|^refresh$", re.IGNORECASE)
+_VERSION = 1
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode for a request the cassette has no answer for."""
+
+
+def _redact(value):
+    if isinstance(value, dict):
+        return {k: (REDACTED if _SECRET_KEY.search(str(k)) else _redact(v)) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_redact(v) for v in value]
+    return value
+
+
+def _params_pairs(params) -> list:
+    """(key, value) pairs of a requests `params` argument, expanded the way requests sends them."""
+    if not params:
+        return []
+    if isinstance(params, bytes):
+        params = params.decode("utf-8", "replace")
+    if isinstance(params, str):
+        return parse_qsl(params, keep_blank_values=True)
+    pairs = []
+    for k, v in (params.items() if hasattr(params, "items") else params):
+        for item in (v if isinstance(v, (list, tuple)) else [v]):
+            if item is not None:
+                pairs.append((str(k), str(item)))
+    return pairs
+
+
+def _request_target(url: str, params=None) -> str:
+    """Path plus sorted, redacted query string (URL query and `params`); the host is dropped."""
+    parsed = urlparse(url)
+    query = sorted(
+        (k, REDACTED if _SECRET_KEY.search(k) else v)
+        for k, v in parse_qsl(parsed.query, keep_blank_values=True) + _params_pairs(params)
+    )
+    return f"{parsed.path}?{urlencode(query)}" if query else parsed.path
+
+
+def _request_body(kwargs: dict):
+    if kwargs.get("json") is not None:
+        return _redact(kwargs["json"])
+    data = kwargs.get("data")
+    if isinstance(data, bytes):
+        data = data.decode("utf-8", "replace")
+    if isinstance(data, str):
+        try:
+            return _redact(_codec.loads(data))
+        except ValueError:
+            return data
+    return data
+
+
+def _bearer_tokens(*header_sets) -> set:
+    tokens = set()
+    for headers in header_sets:
+        value = (headers or {}).get("Authorization") or ""
+        if value.lower().startswith("bearer "):
+            tokens.add(value[7:].strip())
+    return {token for token in tokens if token}
+
+
+class Cassette:
+    def __init__(self, path: str, mode: str = "replay", time_scale: float = 0.0):
+        if mode not in MODES:
+            raise ValueError(f"Cassette mode must be one of {MODES}, not {mode!r}.")
+        self.path = path
+        self.mode = mode
+        self.time_scale = float(time_scale)
+        self.interactions = []
+        self.served = 0
+        self.misses = 0
+        self._secrets = set()
+        self._pending = {}
+        self._last = {}
+        self._lock = threading.Lock()
+        self._saved = False
+        if mode == "replay":
+            self._load()
+
+    # -- persistence -----------------------------------------------------
+
+    def _open(self, mode: str):
+        if self.path.endswith(".gz"):
+            return gzip.open(self.path, mode)
+        return open(self.path, mode)
+
+    def _load(self) -> None:
+        with self._open("rb") as f:
+            data = _codec.loads(f.read())
+        self.interactions = data.get("interactions", [])
+        for interaction in self.interactions:
+            request = interaction["request"]
+            key = (request["method"], request["target"])
+            self._pending.setdefault(key, deque()).append(interaction)
+
+    def save(self) -> None:
+        if self.mode != "record" or self._saved:
+            return
+        self._saved = True
+        with self._lock:
+            text = _codec.dumps({
+                "version": _VERSION,
+                "recorded": datetime.now(timezone.utc).isoformat(),
+                "interactions": self.interactions,
+            })
+            # Scrub bearer tokens that the API echoed back anywhere.
+            for secret in self._secrets:
+                text = text.replace(secret, REDACTED)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._open("wb") as f:
+            f.write(text.encode("utf-8"))
+
+    # -- record ------------------------------------------------------------
+
+    def record(self, method: str, url: str, kwargs: dict, session, response, seconds: float) -> None:
+        content_type = response.headers.get("Content-Type", "")
+        body = response.text
+        if "json" in content_type:
+            try:
+                body = _redact(_codec.loads(response.content))
+            except ValueError:
+                pass
+        interaction = {
+            "request": {
+                "method": method.upper(),
+                "target": _request_target(url, kwargs.get("params")),
+                "body": _request_body(kwargs),
+            },
+            "response": {
+                "status": response.status_code,
+                "contentType": content_type,
+                "body": body,
+                "elapsed": round(seconds, 4),
+            },
+        }
+        secrets = _bearer_tokens(kwargs.get("headers"), getattr(session, "headers", None))
+        with self._lock:
+            self._secrets |= secrets
+            self.interactions.append(interaction)
+
+    # -- replay ------------------------------------------------------------
+
+    def replay(self, method: str, url: str, kwargs: dict) -> requests.Response:
+        key = (method.upper(), _request_target(url, kwargs.get("params")))
+        body = _request_body(kwargs)
+        with self._lock:
+            pending = self._pending.get(key)
+            interaction = None
+            if pending:
+                interaction = next((i for i in pending if i["request"]["body"] == body), pending[0])
+                pending.remove(interaction)
+                self._last[key] = interaction
+            else:
+                interaction = self._last.get(key)
+            if interaction is None:
+                self.misses += 1
+                raise CassetteMissError(f"No recorded response for {key[0]} {key[1]} in {self.path}.")
+            self.served += 1
+        if self.time_scale:
+            time.sleep(interaction["response"].get("elapsed", 0) * self.time_scale)
+        return self._response(url, interaction["response"])
+
+    @staticmethod
+    def _response(url: str, recorded: dict) -> requests.Response:
+        body = recorded["body"]
+        content = body.encode("utf-8") if isinstance(body, str) else _codec.dumps(body).encode("utf-8")
+        response = requests.Response()
+        response.status_code = recorded["status"]
+        response.reason = http.client.responses.get(recorded["status"], "")
+        response.headers = requests.structures.CaseInsensitiveDict({"Content-Type": recorded.get("contentType") or "application/json"})
+        response._content = content
+        response.encoding = "utf-8"
+        response.url = url
+        return response
+
+    def summary(self) -> dict:
+        return {
+            "path": self.path,
+            "mode": self.mode,
+            "interactions": len(self.interactions),
+            "served": self.served,
+            "misses": self.misses,
+        }
+
+
+_active = None
+_env_checked = False
+_state_lock = threading.Lock()
+_virtual_offset = 0.0
+
+
+def start(path: str, mode: str = "replay", time_scale: float = 0.0) -> Cassette:
+    global _active, _env_checked
+    cassette = Cassette(path, mode, time_scale)
+    with _state_lock:
+        previous, _active, _env_checked = _active, cassette, True
+    if previous is not None:
+        previous.save()
+    return cassette
+
+
+def stop():
+    """Deactivate the current cassette, saving it if recording; returns it (or None)."""
+    global _active
+    with _state_lock:
+        cassette, _active = _active, None
+    if cassette is not None:
+        cassette.save()
+    return cassette
+
+
+def active():
+    """The active cassette, activating one from the environment on first use."""
+    global _env_checked
+    if not _env_checked:
+        with _state_lock:
+            env_path = None if _env_checked else os.getenv(CASSETTE_ENV)
+            _env_checked = True
+        if env_path:
+            start(
+                env_path,
+                os.getenv("RW_SYSTEST_CASSETTE_MODE", "replay").strip().lower(),
+                float(os.getenv("RW_SYSTEST_CASSETTE_TIME_SCALE", "0")),
+            )
+    return _active
+
+
+def sleep(seconds: float) -> None:
+    """time.sleep that is compressed while a cassette is replaying."""
+    global _virtual_offset
+    cassette = active()
+    if cassette is None or cassette.mode != "replay":
+        time.sleep(seconds)
+        return
+    scaled = seconds * cassette.time_scale
+    with _state_lock:
+        _virtual_offset += seconds - scaled
+    if scaled:
+        time.sleep(scaled)
+
+
+def clock() -> float:
+    """time.time, advanced by the sleep time skipped during replay."""
+    return time.time() + _virtual_offset
+
+
+atexit.register(stop)
@@ -0,0 +1,105 @@
+"""
+Pluggable JSON codec shared by the Systest and Workspace keywords.
+
+The codec defaults to the standard library, whose output the string-returning
+keywords have always produced. orjson is opt-in, through RW_SYSTEST_JSON_CODEC
+(json | orjson | auto, i.e. orjson when installed) or the `Set JSON Codec`
+keyword; it writes compact separators, so string outputs change. Keywords that produce
+JSON strings for backward compatibility can hand over parsed objects
+instead when native passing is enabled (RW_SYSTEST_NATIVE_OBJECTS=true or
+`Set JSON Codec    native_objects=True`).
+"""
+
+import json, os
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+CODEC_ENV = "RW_SYSTEST_JSON_CODEC"
+NATIVE_ENV = "RW_SYSTEST_NATIVE_OBJECTS"
+
+
+class _StdlibCodec:
+    name = "json"
+
+    @staticmethod
+    def dumps(obj) -> str:
+        return json.dumps(obj)
+
+    @staticmethod
+    def loads(data):
+        return json.loads(data)
+
+
+class _OrjsonCodec:
+    name = "orjson"
+
+    @staticmethod
+    def dumps(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+    @staticmethod
+    def loads(data):
+        return orjson.loads(data)
+
+
+def _resolve(name: str):
+    name = (name or "json").strip().lower()
+    if name == "json":
+        return _StdlibCodec
+    if name == "orjson":
+        if orjson is None:
+            raise ImportError("The orjson codec was requested but orjson is not installed.")
+        return _OrjsonCodec
+    if name == "auto":
+        return _OrjsonCodec if orjson is not None else _StdlibCodec
+    raise ValueError(f"Unknown JSON codec {name!r}; expected json, orjson or auto.")
+
+
+_active = _resolve(os.getenv(CODEC_ENV))
+_native = os.getenv(NATIVE_ENV, "").strip().lower() in ("1", "true", "yes")
+
+
+def set_codec(name: str = "json", native_objects: bool = None) -> str:
+    """Select the active codec (and optionally the native passing default)."""
+    global _active, _native
+    _active = _resolve(name)
+    if native_objects is not None:
+        _native = bool(native_objects)
+    return _active.name
+
+
+def codec_name() -> str:
+    return _active.name
+
+
+def native_default(native: bool = None) -> bool:
+    """Resolve a keyword's `native` argument against the process-wide default."""
+    return _native if native is None else bool(native)
+
+
+def dumps(obj) -> str:
+    return _active.dumps(obj)
+
+
+def loads(data):
+    return _active.loads(data)
+
+
+def as_object(data):
+    """Accept either a JSON string (the legacy keyword contract) or an already parsed object."""
+    if isinstance(data, (str, bytes, bytearray)):
+        return _active.loads(data)
+    return data
+
+
+def response_json(response):
+    """Decode a requests response body with the active codec."""
+    return _active.loads(response.content)
+
+
+def output(obj, native: bool = None):
+    """Return `obj` as-is in native mode, or JSON-encoded for backward compatibility."""
+    return obj if native_default(native) else _active.dumps(obj)
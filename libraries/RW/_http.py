@@ -0,0 +1,91 @@
+"""
+Single entry point for the PAPI calls made by the Systest and Workspace
+keywords. Every call is timed and recorded (endpoint, status, bytes, retries)
+in `_timings`, and goes through the record/replay cassette when one is active.
+
+GETs (listings, RunSession polls, ...) are idempotent, so they are retried on
+connection errors, timeouts and 502/503/504 by default (RW_SYSTEST_HTTP_RETRIES,
+default 2). Other methods are only retried when the caller asks for it.
+"""
+
+import os, time
+from urllib.parse import urlparse
+
+from . import _cassette, _lazy, _timings
+
+requests = _lazy.LazyModule("requests")
+
+# Path segments that are followed by an identifier; the identifier is replaced
+# by a placeholder so that calls aggregate per endpoint rather than per object.
+_ID_AFTER = {
+    "workspaces": "{workspace}",
+    "runsessions": "{runsession}",
+    "runrequests": "{runrequest}",
+    "slxs": "{slx}",
+}
+RETRY_STATUSES = (502, 503, 504)
+GET_RETRIES_ENV = "RW_SYSTEST_HTTP_RETRIES"
+DEFAULT_GET_RETRIES = 2
+
+
+def _default_retries(method: str) -> int:
+    """Retries for a call that did not set them: GETs only, from RW_SYSTEST_HTTP_RETRIES."""
+    if method.upper() != "GET":
+        return 0
+    try:
+        return max(0, int(os.getenv(GET_RETRIES_ENV, DEFAULT_GET_RETRIES)))
+    except ValueError:
+        return DEFAULT_GET_RETRIES
+
+
+def endpoint_label(method: str, url: str) -> str:
+    """e.g. GET https://papi/api/v3/workspaces/ws/runsessions/12 -> GET /workspaces/{workspace}/runsessions/{runsession}"""
+    parts = [part for part in urlparse(url).path.split("/") if part]
+    if "workspaces" in parts:
+        parts = parts[parts.index("workspaces"):]
+    label = []
+    for i, part in enumerate(parts):
+        previous = parts[i - 1] if i else None
+        label.append(_ID_AFTER.get(previous, part))
+    return f"{method.upper()} /{'/'.join(label)}"
+
+
+def request(method: str, url: str, session=None, retries: int = None, backoff: float = 1.0, **kwargs):
+    """
+    Send an HTTP request through `session` (or the requests module) and record
+    it. Connection errors, timeouts and 502/503/504 responses are retried up
+    to `retries` times with a linear backoff; by default GETs are retried
+    RW_SYSTEST_HTTP_RETRIES times and other methods are not.
+    """
+    if retries is None:
+        retries = _default_retries(method)
+    sender = session if session is not None else requests
+    label = endpoint_label(method, url)
+    cassette = _cassette.active()
+    attempt = 0
+    started = time.perf_counter()
+    while True:
+        sent = time.perf_counter()
+        try:
+            if cassette is not None and cassette.mode == "replay":
+                response = cassette.replay(method, url, kwargs)
+            else:
+                response = sender.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt < retries:
+                attempt += 1
+                _cassette.sleep(backoff * attempt)
+                continue
+            _timings.record_http(label, time.perf_counter() - started, None, 0, attempt)
+            raise
+        if cassette is not None and cassette.mode == "record":
+            cassette.record(method, url, kwargs, session, response, time.perf_counter() - sent)
+        if response.status_code in RETRY_STATUSES and attempt < retries:
+            attempt += 1
+            _cassette.sleep(backoff * attempt)
+            continue
+        _timings.record_http(
+            label, time.perf_counter() - started,
+            response.status_code, len(response.content), attempt,
+        )
+        return response
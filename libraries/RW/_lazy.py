@@ -0,0 +1,41 @@
+"""
+Deferred imports for heavy dependencies of the RW keyword libraries.
+
+`LazyModule("requests")` stands in for the module and imports it on first
+attribute access, so suites (and helper imports) that never make an HTTP call
+don't pay for it at startup. Attribute lookups are forwarded on every access
+rather than copied, so module globals that change later (e.g. the cached
+session in RW.platform) stay current.
+"""
+
+import importlib, threading, types
+
+
+class LazyModule(types.ModuleType):
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_target"] = None
+        self.__dict__["_lazy_lock"] = threading.Lock()
+
+    def _lazy_load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_target"]
+        if module is None:
+            with self.__dict__["_lazy_lock"]:
+                module = self.__dict__["_lazy_target"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_lazy_target"] = module
+        return module
+
+    def __getattr__(self, name: str):
+        return getattr(self._lazy_load(), name)
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self._lazy_load(), name, value)
+
+    def __dir__(self):
+        return dir(self._lazy_load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_lazy_target"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
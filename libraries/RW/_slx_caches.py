@@ -0,0 +1,76 @@
+"""
+Process-wide caches of values derived from workspace SLXs, shared by the RW
+keyword libraries (e.g. the task-search memo in RW.Systest and the runbook
+task cache in RW.Workspace) without either library importing the other.
+
+Every cache entry records the SLX short names it was derived from, so that an
+inventory diff only drops the entries it actually affects. Entries registered
+without SLX dependencies depend on the whole workspace and are dropped on any
+change in that workspace. Values are copied in and out, so callers can't
+change a cached value by mutating what they were given.
+"""
+
+import copy, threading
+
+
+class SlxCache:
+    """A small thread-safe cache keyed by (workspace, key)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, workspace: str, key, default=None):
+        with self._lock:
+            entry = self._entries.get((workspace, key))
+        return default if entry is None else copy.deepcopy(entry[0])
+
+    def put(self, workspace: str, key, value, slxs=None) -> None:
+        deps = frozenset(slxs) if slxs else None
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[(workspace, key)] = (value, deps)
+
+    def invalidate(self, workspace: str, slx_names) -> int:
+        """Drop entries of `workspace` that depend on any of `slx_names`."""
+        slx_names = set(slx_names)
+        if not slx_names:
+            return 0
+        with self._lock:
+            stale = [
+                cache_key for cache_key, (_, deps) in self._entries.items()
+                if cache_key[0] == workspace and (deps is None or deps & slx_names)
+            ]
+            for cache_key in stale:
+                del self._entries[cache_key]
+        return len(stale)
+
+    def clear(self, workspace: str = None) -> None:
+        with self._lock:
+            if workspace is None:
+                self._entries.clear()
+            else:
+                for cache_key in [k for k in self._entries if k[0] == workspace]:
+                    del self._entries[cache_key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_REGISTRY = {}
+
+
+def get_cache(name: str) -> SlxCache:
+    """Return the named cache, creating and registering it on first use."""
+    cache = _REGISTRY.get(name)
+    if cache is None:
+        cache = _REGISTRY.setdefault(name, SlxCache(name))
+    return cache
+
+
+def invalidate(workspace: str, slx_names) -> dict:
+    """Invalidate every registered cache for the given SLXs; return drop counts per cache."""
+    slx_names = set(slx_names)
+    return {name: cache.invalidate(workspace, slx_names) for name, cache in _REGISTRY.items()}
+
@@ -0,0 +1,139 @@
+"""
+In-process latency recorder for the Systest and Workspace keywords.
+
+Phases are timed by decorating keywords with `phase(<name>)` (or explicitly
+through the `Start/End Systest Phase` keywords); every PAPI call made through
+`_http.request` is recorded against a normalised endpoint label. Durations are
+kept as running aggregates plus a fixed-bucket histogram, so memory does not
+grow with the number of calls.
+"""
+
+import functools, threading, time
+from collections import Counter
+
+# Histogram bucket upper bounds, in seconds.
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, float("inf"))
+
+
+class _Series:
+    __slots__ = ("count", "total", "min", "max", "last", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.last = None
+        self.buckets = [0] * len(BUCKETS)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total": round(self.total, 4),
+            "mean": round(self.total / self.count, 4) if self.count else None,
+            "min": None if self.min is None else round(self.min, 4),
+            "max": None if self.max is None else round(self.max, 4),
+            "last": None if self.last is None else round(self.last, 4),
+            "histogram": {
+                ("+Inf" if bound == float("inf") else str(bound)): n
+                for bound, n in zip(BUCKETS, self.buckets) if n
+            },
+        }
+
+
+class _Endpoint:
+    __slots__ = ("series", "status", "bytes", "retries", "errors")
+
+    def __init__(self):
+        self.series = _Series()
+        self.status = Counter()
+        self.bytes = 0
+        self.retries = 0
+        self.errors = 0
+
+    def to_dict(self) -> dict:
+        data = self.series.to_dict()
+        data.update({
+            "status": dict(self.status),
+            "bytes": self.bytes,
+            "retries": self.retries,
+            "errors": self.errors,
+        })
+        return data
+
+
+_lock = threading.Lock()
+_phases = {}
+_endpoints = {}
+_open_phases = {}
+
+
+def reset() -> None:
+    with _lock:
+        _phases.clear()
+        _endpoints.clear()
+        _open_phases.clear()
+
+
+def record_phase(name: str, seconds: float) -> None:
+    with _lock:
+        _phases.setdefault(name, _Series()).add(seconds)
+
+
+def record_http(label: str, seconds: float, status=None, nbytes: int = 0, retries: int = 0) -> None:
+    with _lock:
+        endpoint = _endpoints.setdefault(label, _Endpoint())
+        endpoint.series.add(seconds)
+        endpoint.status[str(status) if status is not None else "error"] += 1
+        endpoint.bytes += nbytes
+        endpoint.retries += retries
+        if status is None or status >= 400:
+            endpoint.errors += 1
+
+
+def start_phase(name: str) -> None:
+    with _lock:
+        _open_phases[name] = time.perf_counter()
+
+
+def end_phase(name: str) -> float:
+    with _lock:
+        started = _open_phases.pop(name, None)
+    if started is None:
+        raise ValueError(f"Systest phase {name!r} was not started.")
+    seconds = time.perf_counter() - started
+    record_phase(name, seconds)
+    return seconds
+
+
+def phase(name: str):
+    """Decorator that records the wall time of each call under phase `name`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record_phase(name, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def snapshot() -> dict:
+    with _lock:
+        return {
+            "phases": {name: series.to_dict() for name, series in _phases.items()},
+            "http": {label: endpoint.to_dict() for label, endpoint in _endpoints.items()},
+        }